@@ -0,0 +1,296 @@
+# data_pipeline/apply_osm_changes.py
+# Incremental refresh of the OSM point layers: apply creates / modifies / deletes by osm_id instead
+# of refetching the whole city, then report which neighbourhoods' nearest-POI result could have changed.
+# Change sources:
+#   --osc day1.osc.gz [day2.osc.gz ...]   osmChange files, applied in order
+#   --pbf old.osm.pbf new.osm.pbf         diff of two extracts (via fetch_osm_pbf.py)
+# Outputs: updated data_pipeline/data/toronto_{food,access}_osm.geojson (+ ttc_subway_osm with --layers subway)
+#          data_pipeline/output/osm_changes_affected.json
+#
+# Limitation (osc mode): a way/relation's centre is only recomputed when the change file carries its
+# node coordinates; otherwise its previous position is kept, and ways moved only through their nodes
+# are not seen. Use --pbf for an exact result.
+
+import argparse
+import gzip
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+import geopandas as gpd
+
+import compute_accessibility as access
+import compute_food_access as food
+import compute_transit_access as transit
+import store
+from fetch_osm_pbf import LAYERS, TRACKED_KEYS, bbox_center, extract_layers, feature_row, grow, in_bbox, rows_to_gdf
+from scoring import load_scoring
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT_DIR = ROOT / "data_pipeline" / "output"
+OUT_REPORT = OUT_DIR / "osm_changes_affected.json"
+
+# Which scores table (analytical store) each point layer feeds
+SCORES = {"food": "food", "access": "access", "subway": "transit"}
+
+# Slack on the stored (rounded) nearest distance when deciding whether a point could matter
+DIST_TOL_M = 1.0
+
+
+def merged_offset_m(layer: str, points: gpd.GeoDataFrame) -> float:
+    """
+    Largest member-to-point offset in the consolidated layer the scores are computed from.
+    Distances are measured to the merged point (normalize_points.py), not to the OSM element that
+    changed, so the affected-neighbourhood test needs this much extra slack.
+    """
+    if len(points) == 0:
+        return 0.0
+    if layer == "food":
+        merged = food.load_food_points(points)
+    elif layer == "access":
+        merged = access.load_access_points(points)
+    elif transit.SURFACE_GTFS_ZIP.exists():
+        merged = transit.load_all_stops(transit.SURFACE_GTFS_ZIP, points)
+    else:
+        # every member is within the merge tolerance of its stop, so this is a safe upper bound
+        return float(load_scoring()["transit"]["stop_merge_tolerance_m"])
+    return float(merged["max_offset_m"].max())
+
+
+def open_osc(path: Path):
+    return gzip.open(path, "rb") if path.name.endswith(".gz") else open(path, "rb")
+
+
+def iter_osc(path: Path):
+    """Yield (action, osm_type, osm_id, tags, lon, lat, refs) per element of an osmChange file."""
+    action = None
+    with open_osc(path) as f:
+        for event, el in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if el.tag in ("create", "modify", "delete"):
+                    action = el.tag
+                continue
+            if el.tag not in ("node", "way", "relation"):
+                continue
+
+            tags = {t.get("k"): t.get("v") for t in el.findall("tag")}
+            lon = float(el.get("lon")) if el.get("lon") is not None else None
+            lat = float(el.get("lat")) if el.get("lat") is not None else None
+            if el.tag == "way":
+                refs = [int(nd.get("ref")) for nd in el.findall("nd")]
+            elif el.tag == "relation":
+                refs = [int(m.get("ref")) for m in el.findall("member") if m.get("type") == "node"]
+            else:
+                refs = []
+            yield action, el.tag, int(el.get("id")), tags, lon, lat, refs
+            el.clear()
+
+
+def load_layer(layer: str) -> dict:
+    """Existing layer file as {(osm_type, osm_id): row}; food/subway files only hold nodes."""
+    path = LAYERS[layer]["out"]
+    if not path.exists():
+        raise FileNotFoundError(f"Missing {path} (run fetch_osm_pbf.py or the Overpass fetcher first)")
+    gdf = gpd.read_file(path).to_crs(epsg=4326)
+
+    return keyed_rows(layer, gdf)
+
+
+def keyed_rows(layer: str, gdf: gpd.GeoDataFrame) -> dict:
+    """{(osm_type, osm_id): row} with rows shaped exactly like fetch_osm_pbf.feature_row() output."""
+    cols = LAYERS[layer]["columns"]
+    rows = {}
+    for rec in gdf.to_dict("records"):
+        row = {c: ("" if rec.get(c) is None else rec[c]) for c in cols}
+        row["osm_id"] = int(rec["osm_id"])
+        row["geometry"] = rec["geometry"]
+        rows[(rec.get("osm_type") or "node", row["osm_id"])] = row
+    return rows
+
+
+def upsert(layers: dict, changes: dict, key, tags, lon, lat):
+    """Insert/update key in every layer its tags match; drop it from layers it no longer matches."""
+    osm_type, osm_id = key
+    for layer, rows in layers.items():
+        old = rows.get(key)
+        new = None
+        if lon is not None and in_bbox(lon, lat):
+            new = feature_row(layer, osm_type, osm_id, tags, lon, lat)
+
+        if new is None:
+            if old is not None:
+                del rows[key]
+                changes[layer]["deleted"].append((old["geometry"], None))
+            continue
+
+        rows[key] = new
+        if old is None:
+            changes[layer]["created"].append((None, new["geometry"]))
+        elif old != new:
+            changes[layer]["modified"].append((old["geometry"], new["geometry"]))
+
+
+def remove(layers: dict, changes: dict, key):
+    for layer, rows in layers.items():
+        old = rows.pop(key, None)
+        if old is not None:
+            changes[layer]["deleted"].append((old["geometry"], None))
+
+
+def apply_osc(path: Path, layers: dict, changes: dict):
+    # Pass 1: node ids referenced by tracked ways/relations, so pass 2 keeps only those coordinates
+    needed = set()
+    for action, osm_type, _osm_id, tags, _lon, _lat, refs in iter_osc(path):
+        if action != "delete" and osm_type != "node" and any(k in tags for k in TRACKED_KEYS):
+            needed.update(refs)
+
+    coords = {}
+    for action, osm_type, osm_id, tags, lon, lat, refs in iter_osc(path):
+        key = (osm_type, osm_id)
+        if action == "delete":
+            remove(layers, changes, key)
+            continue
+
+        if osm_type == "node":
+            if osm_id in needed and lon is not None:
+                coords[osm_id] = (lon, lat)
+            upsert(layers, changes, key, tags, lon, lat)
+            continue
+
+        if not any(k in tags for k in TRACKED_KEYS):
+            remove(layers, changes, key)
+            continue
+
+        bbox = None
+        for ref in refs:
+            if ref in coords:
+                bbox = grow(bbox, *coords[ref])
+        if bbox is not None:
+            upsert(layers, changes, key, tags, *bbox_center(bbox))
+            continue
+
+        # No coordinates in this change: keep the previous position if we have one
+        prev = next((rows[key] for rows in layers.values() if key in rows), None)
+        if prev is None:
+            for layer in layers:
+                if feature_row(layer, osm_type, osm_id, tags, 0.0, 0.0) is not None:
+                    changes[layer]["unresolved"] += 1
+            continue
+        upsert(layers, changes, key, tags, prev["geometry"].x, prev["geometry"].y)
+
+
+def apply_extract_diff(old_pbf: Path, new_pbf: Path, layers: dict, changes: dict, index: str = None):
+    old = extract_layers(old_pbf, index)
+    new = extract_layers(new_pbf, index)
+
+    for layer in layers:
+        before, after = keyed_rows(layer, old[layer]), keyed_rows(layer, new[layer])
+        rows = layers[layer]
+        for key in before.keys() - after.keys():
+            old_row = rows.pop(key, None)
+            if old_row is not None:
+                changes[layer]["deleted"].append((old_row["geometry"], None))
+        for key, rec in after.items():
+            if before.get(key) == rec and key in rows:
+                continue
+            old_row = rows.get(key)
+            rows[key] = rec
+            if old_row is None:
+                changes[layer]["created"].append((None, rec["geometry"]))
+            elif old_row != rec:
+                changes[layer]["modified"].append((old_row["geometry"], rec["geometry"]))
+
+
+def affected_neighbourhoods(layer: str, changed: list, slack_m: float = DIST_TOL_M):
+    """
+    Neighbourhoods whose nearest point could differ after the change:
+      - a new/moved-to position closer than the current nearest distance, or
+      - a deleted/moved-from position within the current nearest distance (it may have been the nearest).
+    Returns None when there are no scores to compare against (i.e. rescore everything).
+    """
+    metric = SCORES[layer]
+    dist_col = f"{metric}_dist_m"
+    try:
+        nbh = store.read_neighbourhoods(columns=[])
+        scores = nbh.merge(store.read_scores(metric, [dist_col]), on="neighbourhood_name", how="inner")
+    except FileNotFoundError:
+        return None
+
+    rep = scores.geometry.representative_point().to_crs(epsg=26917)
+    rx, ry = rep.x.to_numpy(), rep.y.to_numpy()
+    current = scores[dist_col].astype(float).to_numpy() + slack_m
+
+    pts = [g for pair in changed for g in pair if g is not None]
+    if not pts:
+        return []
+    pts_m = gpd.GeoSeries(pts, crs="EPSG:4326").to_crs(epsg=26917)
+    px, py = pts_m.x.to_numpy(), pts_m.y.to_numpy()
+
+    hit = np.zeros(len(scores), dtype=bool)
+    for i in range(0, len(px), 5000):  # bounded (points x neighbourhoods) distance matrix
+        d = np.hypot(px[i:i + 5000, None] - rx[None, :], py[i:i + 5000, None] - ry[None, :])
+        hit |= (d <= current[None, :]).any(axis=0)
+
+    return sorted(scores.loc[hit, "neighbourhood_name"].astype(str))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply OSM changes to the POI layers and report affected neighbourhoods.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--osc", type=Path, nargs="+", help="osmChange file(s) (.osc or .osc.gz), applied in order")
+    src.add_argument("--pbf", type=Path, nargs=2, metavar=("OLD", "NEW"), help="diff two .osm.pbf extracts")
+    ap.add_argument("--layers", nargs="+", choices=list(LAYERS), default=["food", "access"])
+    ap.add_argument("--index", default=None, help="pyosmium node index for --pbf (see fetch_osm_pbf.py)")
+    args = ap.parse_args()
+
+    for p in args.osc or args.pbf:
+        if not p.exists():
+            raise FileNotFoundError(f"Missing: {p}")
+
+    layers = {layer: load_layer(layer) for layer in args.layers}
+    changes = {layer: {"created": [], "modified": [], "deleted": [], "unresolved": 0} for layer in layers}
+    # points as they were when the layers were last scored (for the merged-point offset, see merged_offset_m)
+    before = {layer: rows_to_gdf(layer, list(rows.values())) for layer, rows in layers.items()}
+
+    if args.osc:
+        for p in args.osc:
+            print("Applying", p.name, "…")
+            apply_osc(p, layers, changes)
+    else:
+        apply_extract_diff(args.pbf[0], args.pbf[1], layers, changes, args.index)
+
+    report = {}
+    for layer, rows in layers.items():
+        ch = changes[layer]
+        changed = ch["created"] + ch["modified"] + ch["deleted"]
+        if changed:
+            out = LAYERS[layer]["out"]
+            gdf = rows_to_gdf(layer, list(rows.values()))
+            gdf.to_file(out, driver="GeoJSON")
+            print(f"✅ Saved: {out} ({len(gdf)} points)")
+
+        affected = []
+        if changed:
+            slack = DIST_TOL_M + max(merged_offset_m(layer, before[layer]), merged_offset_m(layer, gdf))
+            affected = affected_neighbourhoods(layer, changed, slack)
+        report[layer] = {
+            "created": len(ch["created"]),
+            "modified": len(ch["modified"]),
+            "deleted": len(ch["deleted"]),
+            "unresolved": ch["unresolved"],
+            # null = no previous scores, rescore every neighbourhood
+            "affected_neighbourhoods": affected,
+        }
+        n_aff = "all" if affected is None else len(affected)
+        print(f"{layer}: +{len(ch['created'])} ~{len(ch['modified'])} -{len(ch['deleted'])}"
+              f" (unresolved {ch['unresolved']}) -> {n_aff} neighbourhoods to rescore")
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    OUT_REPORT.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print("✅ Saved:", OUT_REPORT)
+    print('Attribution to include: "© OpenStreetMap contributors"')
+
+
+if __name__ == "__main__":
+    main()
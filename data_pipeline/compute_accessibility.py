@@ -8,6 +8,12 @@ import pandas as pd
 import geopandas as gpd
 from shapely.strtree import STRtree
 
+import store
+from publish_web import MANIFEST, publish
+from summaries import summary_paths, write_summary
+from normalize_points import consolidate_points
+from scoring import load_scoring
+
 ROOT = Path(__file__).resolve().parents[1]
 
 NBH_GEOJSON = ROOT / "web" / "public" / "toronto_neighbourhoods.geojson"
@@ -28,16 +34,37 @@ def pick_name_col(gdf: gpd.GeoDataFrame) -> str:
   return non_geom[0] if non_geom else "geometry"
 
 
-def distance_to_score(dist_m: np.ndarray) -> np.ndarray:
+def distance_to_score(dist_m: np.ndarray, max_dist: float = 2000.0) -> np.ndarray:
   """
   0m -> 100
-  2000m+ -> 0   (about 25 min walk; policy-friendly)
+  max_dist+ -> 0   (2000m default, about 25 min walk; policy-friendly)
   """
-  max_dist = 2000.0
   scaled = np.clip(dist_m / max_dist, 0, 1)
   return np.round((1.0 - scaled) * 100.0, 1)
 
 
+def load_access_points(path, merge_tolerance_m: float = None) -> gpd.GeoDataFrame:
+  """
+  Essential-service POIs (GeoJSON path or loaded GeoDataFrame) as consolidated EPSG:4326 points: features within merge_tolerance_m
+  (default: access.merge_tolerance_m in scoring.json) of each other become one point that keeps
+  its categories and osm ids (normalize_points.py).
+  """
+  if merge_tolerance_m is None:
+    merge_tolerance_m = load_scoring()["access"]["merge_tolerance_m"]
+
+  access = path if isinstance(path, gpd.GeoDataFrame) else gpd.read_file(path)
+  access = access.set_crs(epsg=4326) if access.crs is None else access.to_crs(epsg=4326)
+  access = access[access.geometry.geom_type.isin(["Point"])].copy()
+  if len(access) == 0:
+    raise ValueError(f"No access points found in {getattr(path, 'name', 'access layer')}")
+
+  access["source"] = "access"
+  if "osm_id" in access:
+    osm_type = access["osm_type"].fillna("node").astype(str) + "/" if "osm_type" in access else ""
+    access["source_ids"] = "osm:" + osm_type + access["osm_id"].astype(str)
+  return consolidate_points(access, merge_tolerance_m)
+
+
 def main():
   if not NBH_GEOJSON.exists():
     raise FileNotFoundError(f"Missing: {NBH_GEOJSON}")
@@ -54,16 +81,7 @@ def main():
     crs="EPSG:4326",
   )
 
-  access = gpd.read_file(ACCESS_POINTS).to_crs(epsg=4326)
-  access = access[access.geometry.geom_type.isin(["Point"])].copy()
-
-  # Deduplicate by coordinate
-  access["lon"] = access.geometry.x.round(6)
-  access["lat"] = access.geometry.y.round(6)
-  access = access.drop_duplicates(subset=["lon", "lat"]).drop(columns=["lon", "lat"])
-
-  if len(access) == 0:
-    raise ValueError("No access points found in toronto_access_osm.geojson")
+  access = load_access_points(ACCESS_POINTS)
 
   # Project to meters (Toronto)
   nbh_m = nbh.to_crs(epsg=26917)
@@ -84,15 +102,24 @@ def main():
   out = nbh_m.copy()
   out["neighbourhood_name"] = nbh[name_col].astype(str).values
   out["access_dist_m"] = np.round(dists, 1)
-  out["access_score"] = distance_to_score(dists)
+  out["access_score"] = distance_to_score(dists, load_scoring()["access"]["max_dist_m"])
 
   out = out.to_crs(epsg=4326)
 
-  out.to_file(OUT_GEOJSON, driver="GeoJSON")
-  out.to_file(OUT_WEB_COPY, driver="GeoJSON")
-
-  print("✅ Saved:", OUT_GEOJSON)
+  # Store is the source of truth; the GeoJSON files are exports of it
+  metric_cols = [c for c in out.columns if c.startswith("access_")]
+  store.write_neighbourhoods(out.drop(columns=metric_cols))
+  store.write_scores("access", out[["neighbourhood_name"] + metric_cols])
+  out = store.export_geojson("access", [OUT_GEOJSON, OUT_WEB_COPY])
+  write_summary("access", out, "access_score", "access_dist_m")
+  # the app resolves data through the hashed manifest, so refresh it too
+  publish(verbose=False)
+
+  print("✅ Saved:", store.STORE_GPKG)
+  print("✅ Exported:", OUT_GEOJSON)
   print("✅ Copied for web:", OUT_WEB_COPY)
+  print("✅ Summary:", *summary_paths("access"))
+  print("✅ Published:", MANIFEST)
   print("Access points used:", len(access))
   print('Attribution: "© OpenStreetMap contributors"')
 
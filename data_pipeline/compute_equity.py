@@ -1,14 +1,13 @@
 # data_pipeline/compute_equity.py
 # Merge transit + food scores into a single Equity GeoJSON for the web app.
+# Reads score columns from the analytical store (output/pipeline.gpkg), not from web/public.
 
 from pathlib import Path
 import pandas as pd
-import geopandas as gpd
 
-ROOT = Path(__file__).resolve().parents[1]
+import store
 
-TRANSIT = ROOT / "web" / "public" / "neighbourhood_transit_scores.geojson"
-FOOD = ROOT / "web" / "public" / "neighbourhood_food_scores.geojson"
+ROOT = Path(__file__).resolve().parents[1]
 
 OUT_DIR = ROOT / "data_pipeline" / "output"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -23,34 +22,19 @@ def norm_name(x: str) -> str:
     return " ".join(str(x).strip().lower().split())
 
 
-def main():
-    if not TRANSIT.exists():
-        raise FileNotFoundError(f"Missing: {TRANSIT}")
-    if not FOOD.exists():
-        raise FileNotFoundError(f"Missing: {FOOD}")
-
-    t = gpd.read_file(TRANSIT)
-    f = gpd.read_file(FOOD)
-
-    # Ensure same CRS
-    if t.crs is None:
-        t = t.set_crs(epsg=4326)
-    else:
-        t = t.to_crs(epsg=4326)
-
-    if f.crs is None:
-        f = f.set_crs(epsg=4326)
-    else:
-        f = f.to_crs(epsg=4326)
+def equity_scores(t: pd.DataFrame, f: pd.DataFrame) -> pd.DataFrame:
+    """
+    Equity v1 table from the transit (neighbourhood_name, transit_score, transit_dist_m) and
+    food (neighbourhood_name, food_score, food_dist_m) score tables. Shared with watch_pipeline.py.
+    """
+    t = t[["neighbourhood_name", "transit_score", "transit_dist_m"]].copy()
+    f = f[["neighbourhood_name", "food_score", "food_dist_m"]].copy()
 
     # Build merge keys
     t["k"] = t["neighbourhood_name"].map(norm_name)
     f["k"] = f["neighbourhood_name"].map(norm_name)
 
-    # Keep only needed columns from food (avoid geometry duplication)
-    f2 = f[["k", "food_score", "food_dist_m"]].copy()
-
-    out = t.merge(f2, on="k", how="left")
+    out = t.merge(f[["k", "food_score", "food_dist_m"]], on="k", how="left")
 
     # If any food values missing, set to NaN-safe defaults
     out["food_score"] = pd.to_numeric(out["food_score"], errors="coerce")
@@ -79,12 +63,20 @@ def main():
     out["limiting_factor"] = out.apply(limiting, axis=1)
 
     # Cleanup
-    out = out.drop(columns=["k"])
+    return out.drop(columns=["k"])
+
+
+def main():
+    # Only the columns we need; geometry comes back in at export time
+    t = store.read_scores("transit", ["transit_score", "transit_dist_m"])
+    f = store.read_scores("food", ["food_score", "food_dist_m"])
+    out = equity_scores(t, f)
 
-    out.to_file(OUT_GEOJSON, driver="GeoJSON")
-    out.to_file(OUT_WEB_COPY, driver="GeoJSON")
+    store.write_scores("equity", out)
+    store.export_geojson("equity", [OUT_GEOJSON, OUT_WEB_COPY])
 
-    print("✅ Saved:", OUT_GEOJSON)
+    print("✅ Saved:", store.STORE_GPKG)
+    print("✅ Exported:", OUT_GEOJSON)
     print("✅ Copied for web:", OUT_WEB_COPY)
     print("Note: Add attribution:")
     print(' - Contains information licensed under the Open Government Licence - Toronto')
@@ -1,15 +1,16 @@
 # data_pipeline/compute_equity_v2.py
 # Merge transit + food + access into equity_score_v2
+# Reads score columns from the analytical store (output/pipeline.gpkg), not from web/public.
 
 from pathlib import Path
 import pandas as pd
-import geopandas as gpd
 
-ROOT = Path(__file__).resolve().parents[1]
+import store
+from publish_web import MANIFEST, publish
+from summaries import summary_paths, write_summary
+from scoring import load_scoring, equity_weights
 
-TRANSIT = ROOT / "web" / "public" / "neighbourhood_transit_scores.geojson"
-FOOD = ROOT / "web" / "public" / "neighbourhood_food_scores.geojson"
-ACCESS = ROOT / "web" / "public" / "neighbourhood_access_scores.geojson"
+ROOT = Path(__file__).resolve().parents[1]
 
 OUT_DIR = ROOT / "data_pipeline" / "output"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -25,13 +26,10 @@ def norm_name(x: str) -> str:
 
 
 def main():
-  for p in [TRANSIT, FOOD, ACCESS]:
-    if not p.exists():
-      raise FileNotFoundError(f"Missing: {p}")
-
-  t = gpd.read_file(TRANSIT).to_crs(epsg=4326)
-  f = gpd.read_file(FOOD).to_crs(epsg=4326)
-  a = gpd.read_file(ACCESS).to_crs(epsg=4326)
+  # Only the score columns; geometry comes back in at export time
+  t = store.read_scores("transit")
+  f = store.read_scores("food", ["food_score", "food_dist_m"])
+  a = store.read_scores("access", ["access_score", "access_dist_m"])
 
   t["k"] = t["neighbourhood_name"].map(norm_name)
   f["k"] = f["neighbourhood_name"].map(norm_name)
@@ -44,8 +42,9 @@ def main():
   for c in ["transit_score", "food_score", "access_score", "transit_dist_m", "food_dist_m", "access_dist_m"]:
     out[c] = pd.to_numeric(out[c], errors="coerce")
 
-  # weights (equal by default)
-  w_t, w_f, w_a = 1/3, 1/3, 1/3
+  # weights (equal by default; see scoring.json)
+  w = equity_weights(load_scoring())
+  w_t, w_f, w_a = w["transit"], w["food"], w["access"]
   out["equity_score_v2"] = (w_t*out["transit_score"] + w_f*out["food_score"] + w_a*out["access_score"]).round(1)
 
   def limiting(row):
@@ -62,11 +61,17 @@ def main():
   out["limiting_factor_v2"] = out.apply(limiting, axis=1)
   out = out.drop(columns=["k"])
 
-  out.to_file(OUT_GEOJSON, driver="GeoJSON")
-  out.to_file(OUT_WEB_COPY, driver="GeoJSON")
+  store.write_scores("equity_v2", out)
+  gdf = store.export_geojson("equity_v2", [OUT_GEOJSON, OUT_WEB_COPY])
+  write_summary("equity_v2", gdf, "equity_score_v2")
+  # the app resolves data through the hashed manifest, so refresh it too
+  publish(verbose=False)
 
-  print("✅ Saved:", OUT_GEOJSON)
+  print("✅ Saved:", store.STORE_GPKG)
+  print("✅ Exported:", OUT_GEOJSON)
   print("✅ Copied for web:", OUT_WEB_COPY)
+  print("✅ Summary:", *summary_paths("equity_v2"))
+  print("✅ Published:", MANIFEST)
 
 if __name__ == "__main__":
   main()
@@ -8,6 +8,12 @@ import pandas as pd
 import geopandas as gpd
 from shapely.strtree import STRtree
 
+import store
+from publish_web import MANIFEST, publish
+from summaries import summary_paths, write_summary
+from normalize_points import consolidate_points
+from scoring import load_scoring
+
 ROOT = Path(__file__).resolve().parents[1]
 
 NBH_GEOJSON = ROOT / "web" / "public" / "toronto_neighbourhoods.geojson"
@@ -28,17 +34,36 @@ def pick_name_col(gdf: gpd.GeoDataFrame) -> str:
     return non_geom[0] if non_geom else "geometry"
 
 
-def distance_to_score(dist_m: np.ndarray) -> np.ndarray:
+def distance_to_score(dist_m: np.ndarray, max_dist: float = 1500.0) -> np.ndarray:
     """
     Interpretable scoring:
       0m -> 100
-      1500m+ -> 0  (roughly 15–20 min walk; policy-friendly)
+      max_dist+ -> 0  (1500m default, roughly 15–20 min walk; policy-friendly)
     """
-    max_dist = 1500.0
     scaled = np.clip(dist_m / max_dist, 0, 1)
     return np.round((1.0 - scaled) * 100.0, 1)
 
 
+def load_food_points(path, merge_tolerance_m: float = None) -> gpd.GeoDataFrame:
+    """
+    Food POIs (GeoJSON path or loaded GeoDataFrame) as consolidated EPSG:4326 points: features within merge_tolerance_m (default:
+    food.merge_tolerance_m in scoring.json) of each other, e.g. a shop mapped as both node and
+    building, become one point that keeps its categories and osm ids (normalize_points.py).
+    """
+    if merge_tolerance_m is None:
+        merge_tolerance_m = load_scoring()["food"]["merge_tolerance_m"]
+
+    food = path if isinstance(path, gpd.GeoDataFrame) else gpd.read_file(path)
+    food = food.set_crs(epsg=4326) if food.crs is None else food.to_crs(epsg=4326)
+    food = food[food.geometry.geom_type == "Point"].copy()
+    if len(food) == 0:
+        raise ValueError("Food points GeoJSON has 0 point features.")
+
+    food["source"] = "food"
+    food["source_ids"] = ("osm:" + food["osm_id"].astype(str)) if "osm_id" in food else None
+    return consolidate_points(food, merge_tolerance_m)
+
+
 def main():
     if not NBH_GEOJSON.exists():
         raise FileNotFoundError(f"Missing neighbourhood GeoJSON: {NBH_GEOJSON}")
@@ -62,15 +87,7 @@ def main():
     )
 
     # 2) Food points
-    food = gpd.read_file(FOOD_POINTS).to_crs(epsg=4326)
-    food = food[food.geometry.geom_type == "Point"].copy()
-    if len(food) == 0:
-        raise ValueError("Food points GeoJSON has 0 point features.")
-
-    # Deduplicate food by coordinate (defensive)
-    food["lon"] = food.geometry.x.round(6)
-    food["lat"] = food.geometry.y.round(6)
-    food = food.drop_duplicates(subset=["lon", "lat"]).drop(columns=["lon", "lat"])
+    food = load_food_points(FOOD_POINTS)
 
     # 3) Project to meters (Toronto)
     nbh_m = nbh.to_crs(epsg=26917)
@@ -93,15 +110,24 @@ def main():
     out = nbh_m.copy()
     out["neighbourhood_name"] = nbh[name_col].astype(str).values
     out["food_dist_m"] = np.round(dists, 1)
-    out["food_score"] = distance_to_score(dists)
+    out["food_score"] = distance_to_score(dists, load_scoring()["food"]["max_dist_m"])
 
     out = out.to_crs(epsg=4326)
 
-    out.to_file(OUT_GEOJSON, driver="GeoJSON")
-    out.to_file(OUT_WEB_COPY, driver="GeoJSON")
-
-    print("✅ Saved:", OUT_GEOJSON)
+    # Store is the source of truth; the GeoJSON files are exports of it
+    metric_cols = [c for c in out.columns if c.startswith("food_")]
+    store.write_neighbourhoods(out.drop(columns=metric_cols))
+    store.write_scores("food", out[["neighbourhood_name"] + metric_cols])
+    out = store.export_geojson("food", [OUT_GEOJSON, OUT_WEB_COPY])
+    write_summary("food", out, "food_score", "food_dist_m")
+    # the app resolves data through the hashed manifest, so refresh it too
+    publish(verbose=False)
+
+    print("✅ Saved:", store.STORE_GPKG)
+    print("✅ Exported:", OUT_GEOJSON)
     print("✅ Copied for web:", OUT_WEB_COPY)
+    print("✅ Summary:", *summary_paths("food"))
+    print("✅ Published:", MANIFEST)
     print("Food points used:", len(food))
     print('Attribution to include: "© OpenStreetMap contributors"')
 
@@ -0,0 +1,487 @@
+# data_pipeline/compute_service_reliability.py
+# Service reliability (Toronto) = on-time and cancelled-trip rates from replayed GTFS-Realtime snapshots
+# Inputs:  data_pipeline/data/gtfs_rt/**/*.pb[.gz]  (archived TripUpdates and/or VehiclePositions feeds)
+#          data_pipeline/data/ttc_gtfs.zip           (scheduled stop_times, trips, calendar[_dates])
+# Outputs: data_pipeline/output/stop_reliability.csv
+#          data_pipeline/output/neighbourhood_reliability.csv  (read by compute_transit_access.py)
+#
+# Snapshots are replayed one file at a time in file-name order, so memory stays bounded by the
+# schedule + the trips currently in service, not by how many weeks of snapshots are archived.
+#
+# Per scheduled stop visit: on_time / early / late, cancelled (trip CANCELED or stop SKIPPED), or
+# missed: the trip never appeared in the feed, or the stop got no prediction and no delay carried
+# down from an earlier stop. Missed visits are only counted inside the replay window (first snapshot
+# to last snapshot minus TRIP_IDLE_S); gaps in the archive inside that window count as missed too.
+# A trip is scored once, after it has been idle for TRIP_IDLE_S and its last scheduled stop time
+# plus TRIP_IDLE_S has passed; a scored trip reappearing later is ignored. Predictions whose time had
+# not come by then (or by the last snapshot) are not counted as arrivals. Trips reported without a
+# start_date get the service date whose scheduled times are nearest the snapshot (after-midnight
+# trips belong to the previous day).
+# Requires: pip install gtfs-realtime-bindings
+
+import argparse
+import gzip
+import zipfile
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from compute_transit_access import pick_name_col
+
+ROOT = Path(__file__).resolve().parents[1]
+
+GTFS_ZIP = ROOT / "data_pipeline" / "data" / "ttc_gtfs.zip"
+RT_DIR = ROOT / "data_pipeline" / "data" / "gtfs_rt"
+NBH_GEOJSON = ROOT / "web" / "public" / "toronto_neighbourhoods.geojson"
+
+OUT_DIR = ROOT / "data_pipeline" / "output"
+OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+OUT_STOPS = OUT_DIR / "stop_reliability.csv"
+OUT_NBH = OUT_DIR / "neighbourhood_reliability.csv"
+
+TORONTO_TZ = ZoneInfo("America/Toronto")
+
+# On time = no more than 1 min early and no more than 5 min late (common transit-agency definition)
+EARLY_S = -60
+LATE_S = 300
+
+# A trip that has not appeared in the feed for this long (feed time) is finished and gets scored
+TRIP_IDLE_S = 900
+
+SKIPPED = "skipped"
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def load_rt_bindings():
+    try:
+        from google.transit import gtfs_realtime_pb2
+    except ImportError as e:
+        raise ImportError("GTFS-Realtime bindings missing. Run: pip install gtfs-realtime-bindings") from e
+    return gtfs_realtime_pb2
+
+
+def load_schedule(zip_path: Path) -> dict:
+    """
+    stop_times.txt as flat numpy arrays sorted by (trip_id, stop_sequence) plus a trip_id -> (start, end)
+    index into them and trip_id -> (first, last) scheduled time (seconds, NaN if untimed). Stop ids are stored as int codes into `stop_ids` to keep millions of rows compact.
+    """
+    with zipfile.ZipFile(zip_path, "r") as z:
+        with z.open("stop_times.txt") as f:
+            st = pd.read_csv(
+                f,
+                usecols=["trip_id", "arrival_time", "stop_id", "stop_sequence"],
+                dtype={"trip_id": str, "arrival_time": str, "stop_id": str, "stop_sequence": "int32"},
+            )
+
+    st = st.sort_values(["trip_id", "stop_sequence"], kind="stable").reset_index(drop=True)
+
+    # HH:MM:SS may run past 24:00 for after-midnight service; blank for untimed stops (-> NaN)
+    hms = st["arrival_time"].str.extract(r"^\s*(\d+):(\d+):(\d+)\s*$").astype(float)
+    sched_s = (hms[0] * 3600 + hms[1] * 60 + hms[2]).to_numpy()
+
+    stop_cat = pd.Categorical(st["stop_id"])
+    trip_ids = st["trip_id"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, trip_ids[1:] != trip_ids[:-1]])
+    ends = np.r_[starts[1:], len(st)]
+    # fmin/fmax skip NaN (untimed stops) unless the whole trip is untimed
+    first = np.fmin.reduceat(sched_s, starts) if len(st) else np.array([])
+    last = np.fmax.reduceat(sched_s, starts) if len(st) else np.array([])
+
+    return {
+        "trips": dict(zip(trip_ids[starts], zip(starts.tolist(), ends.tolist()))),
+        "bounds": dict(zip(trip_ids[starts], zip(first.tolist(), last.tolist()))),
+        "stop_seq": st["stop_sequence"].to_numpy(),
+        "stop_code": stop_cat.codes.astype(np.int32),
+        "stop_ids": np.asarray(stop_cat.categories, dtype=object),
+        "sched_s": sched_s,
+    }
+
+
+def load_calendar(zip_path: Path) -> dict:
+    """trips.txt grouped by service_id + calendar.txt / calendar_dates.txt (either may be absent, not both)."""
+    with zipfile.ZipFile(zip_path, "r") as z:
+        names = set(z.namelist())
+
+        def read(name, **kw):
+            if name not in names:
+                return None
+            with z.open(name) as f:
+                return pd.read_csv(f, dtype=str, **kw)
+
+        trips = read("trips.txt", usecols=["trip_id", "service_id"])
+        calendar = read("calendar.txt")
+        calendar_dates = read("calendar_dates.txt", usecols=["service_id", "date", "exception_type"])
+
+    if trips is None or (calendar is None and calendar_dates is None):
+        raise ValueError(f"{zip_path.name}: needs trips.txt and calendar.txt and/or calendar_dates.txt")
+    return {
+        "trips_by_service": trips.groupby("service_id")["trip_id"].agg(list).to_dict(),
+        "calendar": calendar,
+        "calendar_dates": calendar_dates,
+    }
+
+
+def active_services(cal: dict, date: str) -> set:
+    """service_ids running on a YYYYMMDD service date (calendar.txt, then calendar_dates.txt exceptions)."""
+    active = set()
+    c = cal["calendar"]
+    if c is not None:
+        weekday = WEEKDAYS[datetime.strptime(date, "%Y%m%d").weekday()]
+        on = c[(c[weekday].str.strip() == "1") & (c["start_date"] <= date) & (c["end_date"] >= date)]
+        active.update(on["service_id"])
+    cd = cal["calendar_dates"]
+    if cd is not None:
+        day = cd[cd["date"] == date]
+        active.update(day.loc[day["exception_type"].str.strip() == "1", "service_id"])
+        active.difference_update(day.loc[day["exception_type"].str.strip() == "2", "service_id"])
+    return active
+
+
+def replay_dates(t0: float, t1: float) -> list:
+    """Service dates whose trips can run inside [t0, t1], incl. the previous day's after-midnight trips."""
+    day = datetime.fromtimestamp(t0, TORONTO_TZ).date() - timedelta(days=1)
+    last = datetime.fromtimestamp(t1, TORONTO_TZ).date()
+    dates = []
+    while day <= last:
+        dates.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return dates
+
+
+def rt_files(rt_dir: Path) -> list:
+    files = [p for p in rt_dir.rglob("*") if p.is_file() and (p.name.endswith(".pb") or p.name.endswith(".pb.gz"))]
+    # Archives are named by capture time, so name order == replay order
+    return sorted(files, key=lambda p: p.relative_to(rt_dir).as_posix())
+
+
+def read_feed(path: Path, pb2):
+    data = path.read_bytes()
+    if path.name.endswith(".gz"):
+        data = gzip.decompress(data)
+    msg = pb2.FeedMessage()
+    msg.ParseFromString(data)
+    return msg
+
+
+def replay_window(files: list, pb2):
+    """(first, last) feed timestamps from the first / last readable snapshot, or None if none parse."""
+    def first_ts(paths):
+        for p in paths:
+            try:
+                return int(read_feed(p, pb2).header.timestamp)
+            except Exception:
+                continue
+        return None
+
+    t0, t1 = first_ts(files), first_ts(reversed(files))
+    return None if t0 is None else (t0, t1)
+
+
+@lru_cache(maxsize=64)
+def service_day_epoch(start_date: str) -> float:
+    """GTFS times count from 'noon minus 12h' local time on the service date (DST-safe)."""
+    d = datetime.strptime(start_date, "%Y%m%d")
+    noon = datetime(d.year, d.month, d.day, 12, tzinfo=TORONTO_TZ)
+    return noon.timestamp() - 12 * 3600
+
+
+def local_date(ts: int) -> str:
+    return datetime.fromtimestamp(ts, TORONTO_TZ).strftime("%Y%m%d")
+
+
+def service_date(sched: dict, trip_id: str, ts: int) -> str:
+    """
+    Service date for a trip reported without start_date: of the local date and the days either side,
+    the one whose scheduled span for the trip is nearest ts (ties keep the local date).
+    """
+    today = local_date(ts)
+    first, last = sched["bounds"].get(trip_id, (np.nan, np.nan))
+    if np.isnan(first):
+        return today
+
+    d = datetime.strptime(today, "%Y%m%d")
+    best_gap, best = None, today
+    for date in [today, (d - timedelta(days=1)).strftime("%Y%m%d"), (d + timedelta(days=1)).strftime("%Y%m%d")]:
+        day0 = service_day_epoch(date)
+        gap = max(day0 + first - ts, ts - (day0 + last), 0)
+        if best_gap is None or gap < best_gap:
+            best_gap, best = gap, date
+    return best
+
+
+def trip_end(sched: dict, key) -> float:
+    """Epoch of a trip's last scheduled stop time (-inf when unscheduled or untimed)."""
+    trip_id, start_date = key
+    last = sched["bounds"].get(trip_id, (np.nan, np.nan))[1]
+    return -np.inf if np.isnan(last) else service_day_epoch(start_date) + last
+
+
+def new_trip_state(ts: int) -> dict:
+    return {"last_seen": ts, "cancelled": False, "by_seq": {}, "by_stop": {}, "arrived": {}}
+
+
+def ingest_feed(msg, pb2, sched: dict, open_trips: dict, scored: set) -> int:
+    """Fold one snapshot into the per-trip state (trips already scored are ignored); returns the feed timestamp."""
+    ts = int(msg.header.timestamp)
+    CANCELED = pb2.TripDescriptor.CANCELED
+    STU = pb2.TripUpdate.StopTimeUpdate
+    STOPPED_AT = pb2.VehiclePosition.STOPPED_AT
+
+    for ent in msg.entity:
+        if ent.HasField("trip_update"):
+            tu = ent.trip_update
+            if not tu.trip.trip_id:
+                continue
+            key = (tu.trip.trip_id, tu.trip.start_date or service_date(sched, tu.trip.trip_id, ts))
+            if key in scored:
+                continue
+            state = open_trips.setdefault(key, new_trip_state(ts))
+            state["last_seen"] = ts
+            # latest snapshot wins (a cancellation can be withdrawn)
+            state["cancelled"] = tu.trip.schedule_relationship == CANCELED
+
+            for stu in tu.stop_time_update:
+                if stu.schedule_relationship == STU.NO_DATA:
+                    continue
+                if stu.schedule_relationship == STU.SKIPPED:
+                    obs = SKIPPED
+                else:
+                    ev = stu.arrival if stu.HasField("arrival") else stu.departure if stu.HasField("departure") else None
+                    if ev is None:
+                        continue
+                    obs = (
+                        ev.delay if ev.HasField("delay") else None,
+                        ev.time if ev.HasField("time") else None,
+                    )
+                if stu.HasField("stop_sequence"):
+                    state["by_seq"][stu.stop_sequence] = obs
+                elif stu.stop_id:
+                    state["by_stop"][stu.stop_id] = obs
+
+        if ent.HasField("vehicle"):
+            v = ent.vehicle
+            if not v.trip.trip_id or not v.stop_id or v.current_status != STOPPED_AT:
+                continue
+            key = (v.trip.trip_id, v.trip.start_date or service_date(sched, v.trip.trip_id, ts))
+            if key in scored:
+                continue
+            state = open_trips.setdefault(key, new_trip_state(ts))
+            state["last_seen"] = ts
+            # first snapshot that sees the vehicle at the stop ~ its arrival
+            state["arrived"].setdefault(v.stop_id, int(v.timestamp) if v.timestamp else ts)
+
+    return ts
+
+
+def in_window(sched: dict, lo: int, hi: int, start_date: str, window) -> np.ndarray:
+    """Mask of a trip's stops scheduled inside the replay window (untimed stops never are)."""
+    t = service_day_epoch(start_date) + sched["sched_s"][lo:hi]
+    return (t >= window[0]) & (t <= window[1])
+
+
+def finalize_trip(key, state: dict, sched: dict, counts: dict, stats: dict, window, now: int):
+    """
+    Score one finished trip against its scheduled stop_times into the per-stop counters. Stops whose
+    reported / carried arrival is still after `now` (feed time) are predictions, not arrivals: skipped.
+    """
+    trip_id, start_date = key
+    span = sched["trips"].get(trip_id)
+    if span is None:
+        stats["unmatched_trips"] += 1  # added/extra trips have nothing scheduled to compare against
+        return
+    lo, hi = span
+    codes = sched["stop_code"][lo:hi]
+    counted = in_window(sched, lo, hi, start_date, window)
+
+    if state["cancelled"]:
+        np.add.at(counts["cancelled"], codes, 1)
+        stats["cancelled_trips"] += 1
+        return
+
+    stats["scored_trips"] += 1
+    day0 = service_day_epoch(start_date)
+    carry = None
+
+    for i in range(hi - lo):
+        code = codes[i]
+        stop_id = sched["stop_ids"][code]
+        sched_t = sched["sched_s"][lo + i]
+        obs = state["by_seq"].get(int(sched["stop_seq"][lo + i])) or state["by_stop"].get(stop_id)
+
+        if obs == SKIPPED:
+            counts["cancelled"][code] += 1
+            continue
+
+        delay = None
+        event_t = None
+        arrived = state["arrived"].get(stop_id)
+        if arrived is not None and not np.isnan(sched_t):
+            delay = arrived - (day0 + sched_t)
+        elif obs is not None:
+            d, t = obs
+            if d is not None:
+                delay = d
+            elif t is not None and not np.isnan(sched_t):
+                delay = t - (day0 + sched_t)
+            event_t = t
+
+        # GTFS-RT semantics: a delay carries down the trip until the next update
+        if delay is None:
+            delay = carry
+        else:
+            carry = delay
+        if delay is None:
+            # nothing reported for this stop: the vehicle was not seen serving it
+            if counted[i]:
+                counts["missed"][code] += 1
+            continue
+
+        if arrived is None:
+            if event_t is None and not np.isnan(sched_t):
+                event_t = day0 + sched_t + delay
+            if event_t is not None and event_t > now:
+                continue
+
+        if delay < EARLY_S:
+            counts["early"][code] += 1
+        elif delay > LATE_S:
+            counts["late"][code] += 1
+        else:
+            counts["on_time"][code] += 1
+
+
+def count_absent_trips(sched: dict, cal: dict, scored: set, counts: dict, stats: dict, window):
+    """Scheduled trips of the replayed service dates that never appeared in the feed: every stop missed."""
+    for date in replay_dates(*window):
+        for service_id in active_services(cal, date):
+            for trip_id in cal["trips_by_service"].get(service_id, []):
+                span = sched["trips"].get(trip_id)
+                if span is None or (trip_id, date) in scored:
+                    continue
+                lo, hi = span
+                counted = in_window(sched, lo, hi, date, window)
+                if counted.any():
+                    np.add.at(counts["missed"], sched["stop_code"][lo:hi][counted], 1)
+                    stats["missed_trips"] += 1
+
+
+def with_rates(df: pd.DataFrame) -> pd.DataFrame:
+    delivered = df["on_time"] + df["early"] + df["late"]
+    df["visits"] = delivered + df["cancelled"] + df["missed"]
+    df["on_time_rate"] = (df["on_time"] / delivered.where(delivered > 0)).round(4)
+    df["cancelled_rate"] = (df["cancelled"] / df["visits"].where(df["visits"] > 0)).round(4)
+    df["missed_rate"] = (df["missed"] / df["visits"].where(df["visits"] > 0)).round(4)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-stop / per-neighbourhood reliability from archived GTFS-Realtime.")
+    ap.add_argument("--rt-dir", type=Path, default=RT_DIR, help=f"snapshot directory (default {RT_DIR})")
+    args = ap.parse_args()
+
+    if not GTFS_ZIP.exists():
+        raise FileNotFoundError(f"Missing surface GTFS zip: {GTFS_ZIP}")
+    if not NBH_GEOJSON.exists():
+        raise FileNotFoundError(f"Missing neighbourhood GeoJSON: {NBH_GEOJSON}")
+    files = rt_files(args.rt_dir) if args.rt_dir.exists() else []
+    if not files:
+        raise FileNotFoundError(f"No .pb / .pb.gz snapshots under {args.rt_dir}")
+
+    pb2 = load_rt_bindings()
+
+    # 1) Schedule + the window the snapshots cover
+    sched = load_schedule(GTFS_ZIP)
+    cal = load_calendar(GTFS_ZIP)
+    n_stops = len(sched["stop_ids"])
+    counts = {k: np.zeros(n_stops, dtype=np.int64) for k in ["on_time", "early", "late", "cancelled", "missed"]}
+    stats = {"snapshots": 0, "bad_snapshots": 0, "scored_trips": 0, "cancelled_trips": 0, "unmatched_trips": 0,
+             "missed_trips": 0}
+    print("Scheduled trips:", len(sched["trips"]))
+
+    span = replay_window(files, pb2)
+    if span is None:
+        raise ValueError(f"No readable snapshots under {args.rt_dir}")
+    # stops due in the last TRIP_IDLE_S may simply not have been reached yet
+    window = (span[0], span[1] - TRIP_IDLE_S)
+
+    # 2) Replay snapshots, scoring trips once they have dropped out of the feed and are past their schedule
+    open_trips = {}
+    scored = set()
+    last_sweep = None
+    for path in files:
+        try:
+            msg = read_feed(path, pb2)
+        except Exception as e:  # truncated download, wrong file type, ...
+            stats["bad_snapshots"] += 1
+            print(f"⚠️  Skipping {path.name}: {e}")
+            continue
+
+        ts = ingest_feed(msg, pb2, sched, open_trips, scored)
+        stats["snapshots"] += 1
+
+        if last_sweep is None or ts - last_sweep >= 60:
+            # a trip can vanish mid-route (gap in the feed) and come back: wait for its schedule to end too
+            done = [
+                k for k, s in open_trips.items()
+                if ts - s["last_seen"] > TRIP_IDLE_S and ts - trip_end(sched, k) > TRIP_IDLE_S
+            ]
+            for k in done:
+                finalize_trip(k, open_trips.pop(k), sched, counts, stats, window, ts)
+                scored.add(k)
+            last_sweep = ts
+
+    # still running at the end of the archive: only what had happened by the last snapshot counts
+    for k in list(open_trips):
+        finalize_trip(k, open_trips.pop(k), sched, counts, stats, window, span[1])
+        scored.add(k)
+
+    # 3) Scheduled trips the feed never mentioned
+    count_absent_trips(sched, cal, scored, counts, stats, window)
+
+    # 4) Per-stop table
+    per_stop = with_rates(pd.DataFrame({"stop_id": sched["stop_ids"], **counts}))
+    per_stop = per_stop[per_stop["visits"] > 0]
+
+    # every stop_id keeps its own row here (no coordinate dedupe), so all of them can be located
+    with zipfile.ZipFile(GTFS_ZIP, "r") as z:
+        with z.open("stops.txt") as f:
+            stops = pd.read_csv(f, usecols=["stop_id", "stop_lat", "stop_lon"], dtype={"stop_id": str})
+    per_stop = per_stop.merge(stops, on="stop_id", how="left")
+
+    # 5) Per-neighbourhood (stops inside each polygon)
+    nbh = gpd.read_file(NBH_GEOJSON)
+    nbh = nbh.set_crs(epsg=4326) if nbh.crs is None else nbh.to_crs(epsg=4326)
+    nbh["neighbourhood_name"] = nbh[pick_name_col(nbh)].astype(str).values
+
+    located = per_stop.dropna(subset=["stop_lat", "stop_lon"])
+    stop_pts = gpd.GeoDataFrame(
+        located,
+        geometry=gpd.points_from_xy(located["stop_lon"], located["stop_lat"]),
+        crs="EPSG:4326",
+    )
+    joined = gpd.sjoin(stop_pts, nbh[["neighbourhood_name", "geometry"]], predicate="within", how="inner")
+    per_nbh = with_rates(
+        joined.groupby("neighbourhood_name")[["on_time", "early", "late", "cancelled", "missed"]].sum().reset_index()
+    )
+
+    # 6) Save
+    per_stop.to_csv(OUT_STOPS, index=False)
+    per_nbh.to_csv(OUT_NBH, index=False)
+
+    print("Snapshots replayed:", stats["snapshots"], f"(skipped {stats['bad_snapshots']})")
+    print("Trips scored:", stats["scored_trips"], "| cancelled:", stats["cancelled_trips"],
+          "| never in feed:", stats["missed_trips"], "| not in schedule:", stats["unmatched_trips"])
+    print("✅ Saved:", OUT_STOPS)
+    print("✅ Saved:", OUT_NBH)
+    print("Set transit.reliability_weight in scoring.json to fold this into transit_score.")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,15 +8,21 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
 from shapely.strtree import STRtree
 
+import store
+from publish_web import MANIFEST, publish
+from summaries import summary_paths, write_summary
+from normalize_points import consolidate_points
+from scoring import load_scoring
+
 ROOT = Path(__file__).resolve().parents[1]
 
 # Inputs
 SURFACE_GTFS_ZIP = ROOT / "data_pipeline" / "data" / "ttc_gtfs.zip"                 # you already have this
 OSM_SUBWAY_GEOJSON = ROOT / "data_pipeline" / "data" / "ttc_subway_osm.geojson"     # generated by fetch_subway_osm.py
 NBH_GEOJSON = ROOT / "web" / "public" / "toronto_neighbourhoods.geojson"
+RELIABILITY_CSV = ROOT / "data_pipeline" / "output" / "neighbourhood_reliability.csv"  # optional, compute_service_reliability.py
 
 # Outputs
 OUT_DIR = ROOT / "data_pipeline" / "output"
@@ -34,17 +40,43 @@ def pick_name_col(gdf: gpd.GeoDataFrame) -> str:
     return non_geom[0] if non_geom else "geometry"
 
 
-def distance_to_score(dist_m: np.ndarray) -> np.ndarray:
+def distance_to_score(dist_m: np.ndarray, max_dist: float = 2000.0) -> np.ndarray:
     """
     Interpretable scoring (policy-friendly):
       0m -> 100
-      2000m+ -> 0
+      max_dist+ -> 0  (2000m unless overridden in scoring.json)
     """
-    max_dist = 2000.0
     scaled = np.clip(dist_m / max_dist, 0, 1)
     return np.round((1.0 - scaled) * 100.0, 1)
 
 
+def load_reliability(names: pd.Series, path: Path = RELIABILITY_CSV) -> np.ndarray:
+    """
+    Share of scheduled stop visits actually served on time, per neighbourhood:
+      on_time_rate * (1 - cancelled_rate - missed_rate)
+    NaN where the replayed GTFS-Realtime data has no stops in the neighbourhood.
+    """
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Missing reliability table: {path}\n"
+            "Run: python data_pipeline/compute_service_reliability.py (or set transit.reliability_weight to 0)"
+        )
+    rel = pd.read_csv(path)
+    not_served = rel["cancelled_rate"].fillna(0.0) + rel["missed_rate"].fillna(0.0)
+    served = rel["on_time_rate"].fillna(0.0) * (1.0 - not_served)
+    lookup = dict(zip(rel["neighbourhood_name"].astype(str), served))
+    return names.astype(str).map(lookup).to_numpy(dtype=float)
+
+
+def apply_reliability(score: np.ndarray, reliability: np.ndarray, weight: float) -> np.ndarray:
+    """
+    score * (1 - weight * (1 - reliability)); neighbourhoods without data keep their proximity score.
+    weight 1 -> fully scaled by reliability, weight 0 -> unchanged.
+    """
+    factor = 1.0 - weight * (1.0 - np.nan_to_num(reliability, nan=1.0))
+    return np.round(score * factor, 1)
+
+
 def read_stops_from_gtfs_zip(zip_path: Path) -> pd.DataFrame:
     with zipfile.ZipFile(zip_path, "r") as z:
         with z.open("stops.txt") as f:
@@ -56,14 +88,48 @@ def read_stops_from_gtfs_zip(zip_path: Path) -> pd.DataFrame:
     keep = [c for c in ["stop_id", "stop_name", "stop_lat", "stop_lon"] if c in df.columns]
     df = df[keep].copy()
 
-    # Basic cleaning
+    # Basic cleaning (co-located platforms are merged later by consolidate_points)
     df = df.dropna(subset=["stop_lat", "stop_lon"])
-    # Drop duplicate coordinate points (many platforms share ids/variants)
-    df = df.drop_duplicates(subset=["stop_lat", "stop_lon"])
 
     return df
 
 
+def load_all_stops(gtfs_zip: Path, subway_geojson, merge_tolerance_m: float = None) -> gpd.GeoDataFrame:
+    """
+    Surface stops (GTFS) + subway stations (OSM; a GeoJSON path or an already loaded GeoDataFrame)
+    as one consolidated EPSG:4326 point layer. Points within merge_tolerance_m (default:
+    transit.stop_merge_tolerance_m in scoring.json) of a seed stop merge into it; source / source_ids /
+    n_points / max_offset_m record what was merged.
+    """
+    if merge_tolerance_m is None:
+        merge_tolerance_m = load_scoring()["transit"]["stop_merge_tolerance_m"]
+
+    # --- Surface stops from GTFS ---
+    stops_df = read_stops_from_gtfs_zip(gtfs_zip)
+    surface_geom = gpd.points_from_xy(stops_df["stop_lon"], stops_df["stop_lat"])
+    surface_stops = gpd.GeoDataFrame(stops_df, geometry=surface_geom, crs="EPSG:4326")[["geometry"]].copy()
+    surface_stops["source"] = "surface"
+    surface_stops["source_ids"] = ("gtfs:" + stops_df["stop_id"].astype(str)).values if "stop_id" in stops_df else None
+
+    # --- Subway stations from OSM (GeoJSON points) ---
+    subway = subway_geojson if isinstance(subway_geojson, gpd.GeoDataFrame) else gpd.read_file(subway_geojson)
+    subway = subway.set_crs(epsg=4326) if subway.crs is None else subway.to_crs(epsg=4326)
+
+    # Keep only point geometries (defensive)
+    subway = subway[subway.geometry.geom_type == "Point"].copy()
+    subway["source"] = "subway"
+    subway["source_ids"] = ("osm:" + subway["osm_id"].astype(str)) if "osm_id" in subway else None
+    subway = subway[["source", "source_ids", "geometry"]]
+
+    # --- Merge stops: GTFS platforms + OSM station nodes a few metres apart become one stop ---
+    all_stops = gpd.GeoDataFrame(
+        pd.concat([surface_stops, subway], ignore_index=True),
+        geometry="geometry",
+        crs="EPSG:4326",
+    )
+    return consolidate_points(all_stops, merge_tolerance_m)
+
+
 def main():
     # --- file checks ---
     if not NBH_GEOJSON.exists():
@@ -94,42 +160,20 @@ def main():
         crs="EPSG:4326",
     )
 
-    # --- 2) Load surface stops from GTFS ---
-    stops_df = read_stops_from_gtfs_zip(SURFACE_GTFS_ZIP)
-    surface_geom = [Point(xy) for xy in zip(stops_df["stop_lon"], stops_df["stop_lat"])]
-    surface_stops = gpd.GeoDataFrame(stops_df, geometry=surface_geom, crs="EPSG:4326")[["geometry"]].copy()
-
-    # --- 3) Load subway stations from OSM (GeoJSON points) ---
-    subway = gpd.read_file(OSM_SUBWAY_GEOJSON)
-    subway = subway.to_crs(epsg=4326)
-    subway = subway[["geometry"]].copy()
-
-    # Keep only point geometries (defensive)
-    subway = subway[subway.geometry.geom_type == "Point"].copy()
-
-    # --- 4) Merge stops ---
-    all_stops = gpd.GeoDataFrame(
-        pd.concat([surface_stops, subway], ignore_index=True),
-        geometry="geometry",
-        crs="EPSG:4326",
-    )
-
-    # Deduplicate merged stops by coordinates
-    all_stops["lon"] = all_stops.geometry.x.round(6)
-    all_stops["lat"] = all_stops.geometry.y.round(6)
-    all_stops = all_stops.drop_duplicates(subset=["lon", "lat"]).drop(columns=["lon", "lat"])
+    # --- 2) Surface GTFS stops + OSM subway stations ---
+    all_stops = load_all_stops(SURFACE_GTFS_ZIP, OSM_SUBWAY_GEOJSON)
 
-    print("Surface stops:", len(surface_stops))
-    print("Subway stations (OSM):", len(subway))
-    print("Total unique stop points used:", len(all_stops))
+    print("Surface stops:", int(all_stops["source"].str.contains("surface").sum()))
+    print("Subway stations (OSM):", int(all_stops["source"].str.contains("subway").sum()))
+    print("Total consolidated stop points used:", len(all_stops), f"(from {int(all_stops['n_points'].sum())})")
 
-    # --- 5) Project to meters for distance calculations ---
+    # --- 3) Project to meters for distance calculations ---
     # EPSG:26917 (UTM 17N) is good for Toronto distances
     nbh_m = nbh.to_crs(epsg=26917)
     nbh_points_m = nbh_points.to_crs(epsg=26917)
     stops_m = all_stops.to_crs(epsg=26917)
 
-    # --- 6) Nearest stop distance using STRtree (Shapely 2 safe) ---
+    # --- 4) Nearest stop distance using STRtree (Shapely 2 safe) ---
     stop_geoms = list(stops_m.geometry.values)
     tree = STRtree(stop_geoms)
 
@@ -142,21 +186,38 @@ def main():
     dists = np.empty(len(nbh_points_m), dtype=float)
     dists[idx_left] = np.array(dist, dtype=float)  # meters
 
-    # --- 7) Build output GeoJSON ---
+    # --- 5) Build output GeoJSON ---
     out = nbh_m.copy()
     out["neighbourhood_name"] = nbh[name_col].astype(str).values
     out["transit_dist_m"] = np.round(dists, 1)
-    out["transit_score"] = distance_to_score(dists)
+    cfg = load_scoring()["transit"]
+    out["transit_score"] = distance_to_score(dists, cfg["max_dist_m"])
+
+    # Optional: discount for buses that never show up (replayed GTFS-Realtime)
+    if cfg["reliability_weight"] > 0:
+        out["transit_reliability"] = np.round(load_reliability(out["neighbourhood_name"]), 3)
+        out["transit_score"] = apply_reliability(
+            out["transit_score"].to_numpy(), out["transit_reliability"].to_numpy(), cfg["reliability_weight"]
+        )
 
     # back to WGS84 for web maps
     out = out.to_crs(epsg=4326)
 
-    # --- 8) Save ---
-    out.to_file(OUT_GEOJSON, driver="GeoJSON")
-    out.to_file(OUT_WEB_COPY, driver="GeoJSON")
-
-    print("✅ Saved:", OUT_GEOJSON)
+    # --- 6) Save ---
+    # Store is the source of truth; the GeoJSON files are exports of it
+    metric_cols = [c for c in out.columns if c.startswith("transit_")]
+    store.write_neighbourhoods(out.drop(columns=metric_cols))
+    store.write_scores("transit", out[["neighbourhood_name"] + metric_cols])
+    out = store.export_geojson("transit", [OUT_GEOJSON, OUT_WEB_COPY])
+    write_summary("transit", out, "transit_score", "transit_dist_m")
+    # the app resolves data through the hashed manifest, so refresh it too
+    publish(verbose=False)
+
+    print("✅ Saved:", store.STORE_GPKG)
+    print("✅ Exported:", OUT_GEOJSON)
     print("✅ Copied for web:", OUT_WEB_COPY)
+    print("✅ Summary:", *summary_paths("transit"))
+    print("✅ Published:", MANIFEST)
     print("\nAttribution to include in your app:")
     print(' - Contains information licensed under the Open Government Licence - Toronto')
     print(' - © OpenStreetMap contributors')
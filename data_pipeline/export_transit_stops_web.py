@@ -1,16 +1,18 @@
 # data_pipeline/export_transit_stops_web.py
 # Export surface GTFS stops + OSM subway points to web/public/transit_stops.geojson
+# Uses the same consolidated stop layer as compute_transit_access.py (near-duplicates merged,
+# see normalize_points.py); the full provenance copy goes to output/transit_stops.geojson.
 
-import zipfile
 from pathlib import Path
-import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
+
+from compute_transit_access import load_all_stops
+from publish_web import MANIFEST, publish
 
 ROOT = Path(__file__).resolve().parents[1]
 GTFS = ROOT / "data_pipeline" / "data" / "ttc_gtfs.zip"
 SUBWAY = ROOT / "data_pipeline" / "data" / "ttc_subway_osm.geojson"
 OUT = ROOT / "web" / "public" / "transit_stops.geojson"
+OUT_FULL = ROOT / "data_pipeline" / "output" / "transit_stops.geojson"
 
 def main():
   if not GTFS.exists():
@@ -18,33 +20,19 @@ def main():
   if not SUBWAY.exists():
     raise FileNotFoundError(SUBWAY)
 
-  with zipfile.ZipFile(GTFS, "r") as z:
-    with z.open("stops.txt") as f:
-      df = pd.read_csv(f)
-
-  df = df.dropna(subset=["stop_lat", "stop_lon"])
-  df = df.drop_duplicates(subset=["stop_lat", "stop_lon"])
-
-  surface_geom = [Point(xy) for xy in zip(df["stop_lon"], df["stop_lat"])]
-  surface = gpd.GeoDataFrame({"source": ["surface"]*len(df)}, geometry=surface_geom, crs="EPSG:4326")[["source","geometry"]]
-
-  subway = gpd.read_file(SUBWAY).to_crs(epsg=4326)
-  subway = subway[subway.geometry.geom_type == "Point"].copy()
-  subway["source"] = "subway"
-  subway = subway[["source","geometry"]]
-
-  allp = pd.concat([surface, subway], ignore_index=True)
-  allg = gpd.GeoDataFrame(allp, geometry="geometry", crs="EPSG:4326")
+  allg = load_all_stops(GTFS, SUBWAY)
 
-  # dedupe by coordinates
-  allg["lon"] = allg.geometry.x.round(6)
-  allg["lat"] = allg.geometry.y.round(6)
-  allg = allg.drop_duplicates(subset=["lon","lat"]).drop(columns=["lon","lat"])
+  OUT_FULL.parent.mkdir(parents=True, exist_ok=True)
+  allg.to_file(OUT_FULL, driver="GeoJSON")
 
+  # browser only needs the points (heatmap) + a little context; ids stay in the output copy
   OUT.parent.mkdir(parents=True, exist_ok=True)
-  allg.to_file(OUT, driver="GeoJSON")
+  allg[["source", "n_points", "geometry"]].to_file(OUT, driver="GeoJSON")
+  publish(verbose=False)
   print("✅ Exported stops:", OUT)
-  print("Count:", len(allg))
+  print("✅ With provenance:", OUT_FULL)
+  print("✅ Published:", MANIFEST)
+  print("Count:", len(allg), f"(merged from {int(allg['n_points'].sum())} points)")
 
 if __name__ == "__main__":
   main()
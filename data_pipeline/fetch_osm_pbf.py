@@ -0,0 +1,255 @@
+# data_pipeline/fetch_osm_pbf.py
+# Offline alternative to the three Overpass fetchers: read a local .osm.pbf extract (Toronto, GTA or
+# all of Ontario) and write the same three GeoJSON layers with the same schemas:
+#   data_pipeline/data/toronto_food_osm.geojson    (fetch_food_osm.py)
+#   data_pipeline/data/toronto_access_osm.geojson  (fetch_access_osm.py)
+#   data_pipeline/data/ttc_subway_osm.geojson      (fetch_subway_osm.py)
+#
+# Ways/relations get the centre of their bounding box, like Overpass `out center`.
+# Node locations go to an on-disk index by default, so a province-sized extract runs in bounded RAM.
+# No network access at all. Requires: pip install osmium
+# Usage: python data_pipeline/fetch_osm_pbf.py ontario-latest.osm.pbf
+
+import argparse
+import re
+import tempfile
+from pathlib import Path
+
+import geopandas as gpd
+from shapely.geometry import Point
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data_pipeline" / "data"
+
+# Toronto bbox (south, west, north, east) — same as the Overpass queries
+TORONTO_BBOX = (43.55, -79.65, 43.86, -79.10)
+
+# Only elements carrying one of these keys can match any layer (cheap pre-filter)
+TRACKED_KEYS = ("shop", "amenity", "railway", "public_transport")
+
+ACCESS_AMENITIES = {"hospital", "clinic", "doctors", "community_centre"}
+TTC_NETWORK = re.compile(r"TTC|Toronto Transit Commission", re.IGNORECASE)
+
+
+def match_food(tags):
+    """shop=supermarket|convenience, amenity=marketplace -> category (fetch_food_osm.py)."""
+    if tags.get("shop") in ("supermarket", "convenience") or tags.get("amenity") == "marketplace":
+        return tags.get("shop") or tags.get("amenity") or ""
+    return None
+
+
+def match_access(tags):
+    """amenity=hospital|clinic|doctors|community_centre -> category (fetch_access_osm.py)."""
+    amenity = tags.get("amenity")
+    return amenity if amenity in ACCESS_AMENITIES else None
+
+
+def match_subway(tags):
+    """Subway stations or TTC-network railway stations (fetch_subway_osm.py)."""
+    railway = tags.get("railway")
+    if tags.get("station") == "subway" and (railway == "station" or tags.get("public_transport") == "station"):
+        return ""
+    if railway == "station" and TTC_NETWORK.search(tags.get("network", "")):
+        return ""
+    return None
+
+
+# Element types and output columns mirror each Overpass query / fetcher exactly
+LAYERS = {
+    "food": {
+        "out": DATA_DIR / "toronto_food_osm.geojson",
+        "types": ("node",),
+        "match": match_food,
+        "columns": ["name", "category", "osm_id"],
+    },
+    "access": {
+        "out": DATA_DIR / "toronto_access_osm.geojson",
+        "types": ("node", "way", "relation"),
+        "match": match_access,
+        "columns": ["osm_type", "osm_id", "category", "name"],
+    },
+    "subway": {
+        "out": DATA_DIR / "ttc_subway_osm.geojson",
+        "types": ("node",),
+        "match": match_subway,
+        "columns": ["name", "osm_id"],
+    },
+}
+
+
+def in_bbox(lon: float, lat: float) -> bool:
+    s, w, n, e = TORONTO_BBOX
+    return s <= lat <= n and w <= lon <= e
+
+
+def has_tracked_key(tags) -> bool:
+    return any(k in tags for k in TRACKED_KEYS)
+
+
+def feature_row(layer: str, osm_type: str, osm_id: int, tags, lon: float, lat: float):
+    """The layer's output row for one OSM element, or None if its tags don't match the layer."""
+    spec = LAYERS[layer]
+    if osm_type not in spec["types"]:
+        return None
+    category = spec["match"](tags)
+    if category is None:
+        return None
+    row = {"osm_type": osm_type, "osm_id": osm_id, "category": category, "name": tags.get("name", "")}
+    out = {c: row[c] for c in spec["columns"]}
+    out["geometry"] = Point(lon, lat)
+    return out
+
+
+def rows_to_gdf(layer: str, rows: list) -> gpd.GeoDataFrame:
+    cols = LAYERS[layer]["columns"] + ["geometry"]
+    gdf = gpd.GeoDataFrame(rows, columns=cols, geometry="geometry", crs="EPSG:4326")
+
+    # Deduplicate by coordinates (same as the Overpass fetchers)
+    if len(gdf) > 0:
+        gdf["lon"] = gdf.geometry.x.round(6)
+        gdf["lat"] = gdf.geometry.y.round(6)
+        gdf = gdf.drop_duplicates(subset=["lon", "lat"]).drop(columns=["lon", "lat"])
+    return gdf
+
+
+def bbox_center(bbox):
+    minx, miny, maxx, maxy = bbox
+    return (minx + maxx) / 2.0, (miny + maxy) / 2.0
+
+
+def grow(bbox, lon: float, lat: float):
+    if bbox is None:
+        return [lon, lat, lon, lat]
+    bbox[0] = min(bbox[0], lon)
+    bbox[1] = min(bbox[1], lat)
+    bbox[2] = max(bbox[2], lon)
+    bbox[3] = max(bbox[3], lat)
+    return bbox
+
+
+def load_osmium():
+    try:
+        import osmium
+    except ImportError as e:
+        raise ImportError("PBF mode needs pyosmium. Run: pip install osmium") from e
+    return osmium
+
+
+def extract_layers(pbf: Path, index: str = None) -> dict:
+    """
+    Two streaming passes over the extract:
+      1) relations only: remember which matching relations exist and which ways/nodes they reference
+      2) nodes + ways with node locations: emit node/way features and grow the relation bboxes
+    Returns {layer: GeoDataFrame} for every key in LAYERS.
+    """
+    osmium = load_osmium()
+    rel_layers = [name for name, spec in LAYERS.items() if "relation" in spec["types"]]
+
+    class RelationPass(osmium.SimpleHandler):
+        def __init__(self):
+            super().__init__()
+            self.rels = {}  # rel id -> {"tags": dict, "bbox": None}
+            self.member_nodes = {}  # node id -> [rel ids]
+            self.member_ways = {}  # way id -> [rel ids]
+
+        def relation(self, r):
+            if not has_tracked_key(r.tags):
+                return
+            if not any(LAYERS[layer]["match"](r.tags) is not None for layer in rel_layers):
+                return
+            self.rels[r.id] = {"tags": {t.k: t.v for t in r.tags}, "bbox": None}
+            for m in r.members:
+                if m.type == "n":
+                    self.member_nodes.setdefault(m.ref, []).append(r.id)
+                elif m.type == "w":
+                    self.member_ways.setdefault(m.ref, []).append(r.id)
+
+    class FeaturePass(osmium.SimpleHandler):
+        def __init__(self, rel_pass):
+            super().__init__()
+            self.rows = {layer: [] for layer in LAYERS}
+            self.rp = rel_pass
+
+        def emit(self, osm_type, osm_id, tags, lon, lat):
+            if not in_bbox(lon, lat):
+                return
+            for layer in LAYERS:
+                row = feature_row(layer, osm_type, osm_id, tags, lon, lat)
+                if row is not None:
+                    self.rows[layer].append(row)
+
+        def node(self, n):
+            if not n.location.valid():
+                return
+            lon, lat = n.location.lon, n.location.lat
+            for rid in self.rp.member_nodes.get(n.id, ()):
+                rel = self.rp.rels[rid]
+                rel["bbox"] = grow(rel["bbox"], lon, lat)
+            if has_tracked_key(n.tags):
+                self.emit("node", n.id, n.tags, lon, lat)
+
+        def way(self, w):
+            rel_ids = self.rp.member_ways.get(w.id, ())
+            tracked = has_tracked_key(w.tags)
+            if not tracked and not rel_ids:
+                return
+
+            bbox = None
+            for nd in w.nodes:
+                if nd.location.valid():
+                    bbox = grow(bbox, nd.location.lon, nd.location.lat)
+            if bbox is None:
+                return  # way clipped out of the extract
+
+            for rid in rel_ids:
+                rel = self.rp.rels[rid]
+                rel["bbox"] = grow(grow(rel["bbox"], bbox[0], bbox[1]), bbox[2], bbox[3])
+            if tracked:
+                self.emit("way", w.id, w.tags, *bbox_center(bbox))
+
+    print("Pass 1/2: relations…")
+    rp = RelationPass()
+    rp.apply_file(str(pbf), locations=False)
+
+    print("Pass 2/2: nodes + ways…")
+    with tempfile.TemporaryDirectory(prefix="osm_nodes_") as tmp:
+        # sparse on-disk node cache: RAM use stays flat even for a province extract
+        idx = index or f"sparse_file_array,{Path(tmp) / 'nodes.idx'}"
+        fp = FeaturePass(rp)
+        fp.apply_file(str(pbf), locations=True, idx=idx)
+
+    for rid, rel in rp.rels.items():
+        if rel["bbox"] is not None:
+            fp.emit("relation", rid, rel["tags"], *bbox_center(rel["bbox"]))
+
+    return {layer: rows_to_gdf(layer, rows) for layer, rows in fp.rows.items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Extract food / essential-service / subway layers from a local .osm.pbf.")
+    ap.add_argument("pbf", type=Path, help="local OSM extract, e.g. ontario-latest.osm.pbf")
+    ap.add_argument("--layers", nargs="+", choices=list(LAYERS), default=list(LAYERS))
+    ap.add_argument(
+        "--index",
+        default=None,
+        help="pyosmium node-location index (default: on-disk sparse_file_array; 'flex_mem' is faster for city extracts)",
+    )
+    args = ap.parse_args()
+
+    if not args.pbf.exists():
+        raise FileNotFoundError(f"Missing OSM extract: {args.pbf}")
+
+    layers = extract_layers(args.pbf, args.index)
+
+    for layer in args.layers:
+        gdf = layers[layer]
+        out = LAYERS[layer]["out"]
+        out.parent.mkdir(parents=True, exist_ok=True)
+        gdf.to_file(out, driver="GeoJSON")
+        print(f"✅ Saved: {out} ({len(gdf)} {layer} points)")
+
+    print('Attribution to include: "© OpenStreetMap contributors"')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# data_pipeline/publish_web.py
+# Publish step: copy the web data files (score layers, stops, summaries) under content-hashed names so browsers/CDN can cache them forever.
+#   web/public/<name>.geojson          (written by the compute_* / export scripts, fixed names)
+#   -> web/public/data/<stem>.<hash>.geojson   immutable, cached for a year
+#   -> web/public/data-manifest.json           {"assets": {"<name>.geojson": "/data/<stem>.<hash>.geojson"}}, always revalidated
+# and keeps the matching Cache-Control headers in web/vercel.json. The SPA fallback rewrite skips /data/,
+# so a pruned or unknown hashed URL is a 404 instead of index.html cached as immutable.
+# The compute_* / export_transit_stops_web.py scripts and watch_pipeline.py call publish() after
+# writing; run it by hand after editing anything in web/public yourself:
+#   python data_pipeline/publish_web.py
+# The manifest wins over the plain names, so a web/public file that was not published is not served.
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+WEB_PUBLIC = ROOT / "web" / "public"
+HASHED_DIR = WEB_PUBLIC / "data"
+MANIFEST = WEB_PUBLIC / "data-manifest.json"
+VERCEL_JSON = ROOT / "web" / "vercel.json"
+
+# Files the browser fetches (App.jsx / MapView.jsx look them up in the manifest by these names)
+ASSETS = [
+    "neighbourhood_transit_scores.geojson",
+    "neighbourhood_food_scores.geojson",
+    "neighbourhood_access_scores.geojson",
+    "neighbourhood_equity_v2_scores.geojson",
+    "transit_stops.geojson",
+    "neighbourhood_transit_summary.json",
+    "neighbourhood_food_summary.json",
+    "neighbourhood_access_summary.json",
+    "neighbourhood_equity_v2_summary.json",
+]
+
+HASH_LEN = 12
+
+# SPA fallback for everything except the hashed assets
+SPA_REWRITE = {"source": "/((?!data/).*)", "destination": "/"}
+CATCH_ALL_SOURCES = {"/(.*)", SPA_REWRITE["source"]}
+
+CACHE_HEADERS = [
+    {"source": "/data/(.*)", "headers": [{"key": "Cache-Control", "value": "public, max-age=31536000, immutable"}]},
+    {"source": "/data-manifest.json", "headers": [{"key": "Cache-Control", "value": "no-cache"}]},
+]
+
+
+def content_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:HASH_LEN]
+
+
+def write_json_atomic(path: Path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def update_vercel_config(path: Path = VERCEL_JSON):
+    """Add/refresh our Cache-Control rules and SPA rewrite, leaving any other vercel.json settings untouched."""
+    cfg = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    ours = {h["source"] for h in CACHE_HEADERS}
+    headers = [h for h in cfg.get("headers", []) if h.get("source") not in ours] + CACHE_HEADERS
+    rewrites = [r for r in cfg.get("rewrites", []) if r.get("source") not in CATCH_ALL_SOURCES] + [SPA_REWRITE]
+    if cfg.get("headers") != headers or cfg.get("rewrites") != rewrites:
+        cfg["rewrites"] = rewrites
+        cfg["headers"] = headers
+        write_json_atomic(path, cfg)
+
+
+def publish(verbose: bool = True) -> dict:
+    """Hash + copy every present asset, write the manifest, prune hashed files no longer referenced."""
+    HASHED_DIR.mkdir(parents=True, exist_ok=True)
+
+    assets = {}
+    for name in ASSETS:
+        src = WEB_PUBLIC / name
+        if not src.exists():
+            if verbose:
+                print(f"⚠️  Skipping missing {src}")
+            continue
+        stem, suffix = name.rsplit(".", 1)
+        hashed = HASHED_DIR / f"{stem}.{content_hash(src)}.{suffix}"
+        if not hashed.exists():
+            tmp = hashed.with_name(hashed.name + ".tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, hashed)
+            if verbose:
+                print("✅ Published:", hashed.relative_to(WEB_PUBLIC))
+        assets[name] = f"/data/{hashed.name}"
+
+    write_json_atomic(MANIFEST, {"assets": assets})
+
+    # Manifest is revalidated on every visit, so older hashed files are no longer reachable
+    keep = {Path(url).name for url in assets.values()}
+    for p in HASHED_DIR.iterdir():
+        if p.is_file() and p.name not in keep:
+            p.unlink()
+
+    update_vercel_config()
+    return assets
+
+
+def main():
+    assets = publish()
+    print("✅ Manifest:", MANIFEST)
+    for name, url in assets.items():
+        print(f"   {name} -> {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# data_pipeline/score_addresses.py
+# Bulk scoring for partner files: lon/lat rows -> neighbourhood + transit / food / access scores
+# Input:  CSV or Parquet with longitude/latitude columns (already geocoded)
+# Output: same rows + neighbourhood_name, {transit,food,access}_dist_m, {transit,food,access}_score
+#
+# The input is read in chunks and fanned out over a process pool. Layers and spatial indexes are
+# built once in the parent; on fork-based platforms workers share them copy-on-write, elsewhere
+# each worker builds its own copy once at start-up. At most 2 chunks per worker are in flight,
+# so memory stays flat regardless of input size.
+# Usage: python data_pipeline/score_addresses.py clients.csv scored.csv [--lon-col lon --lat-col lat]
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from pyproj import Transformer
+from shapely.strtree import STRtree
+
+import compute_transit_access as transit
+import compute_food_access as food
+import compute_accessibility as access
+from scoring import load_scoring
+
+NBH_GEOJSON = transit.NBH_GEOJSON
+
+METRICS = {
+    "transit": (lambda: transit.load_all_stops(transit.SURFACE_GTFS_ZIP, transit.OSM_SUBWAY_GEOJSON), transit.distance_to_score),
+    "food": (lambda: food.load_food_points(food.FOOD_POINTS), food.distance_to_score),
+    "access": (lambda: access.load_access_points(access.ACCESS_POINTS), access.distance_to_score),
+}
+
+# Filled by build_layers(): read-only for the lifetime of the process
+LAYERS = None
+
+
+def build_layers() -> dict:
+    cfg = load_scoring()
+
+    nbh = gpd.read_file(NBH_GEOJSON)
+    nbh = nbh.set_crs(epsg=4326) if nbh.crs is None else nbh.to_crs(epsg=4326)
+    polys = nbh.geometry.values
+    shapely.prepare(polys)  # GEOS prepared geometry -> indexed point-in-polygon
+
+    layers = {
+        "cfg": cfg,
+        "nbh_names": nbh[transit.pick_name_col(nbh)].astype(str).to_numpy(dtype=object),
+        "nbh_polys": polys,
+        "nbh_bounds": shapely.bounds(polys),
+        "to_m": Transformer.from_crs("EPSG:4326", "EPSG:26917", always_xy=True),
+        "trees": {},
+    }
+
+    for metric, (load, _score) in METRICS.items():
+        pts = load().to_crs(epsg=26917)
+        layers["trees"][metric] = STRtree(pts.geometry.values)
+
+    if cfg["transit"]["reliability_weight"] > 0:
+        rel = transit.load_reliability(pd.Series(layers["nbh_names"]))
+        layers["reliability"] = dict(zip(layers["nbh_names"], rel))
+
+    return layers
+
+
+def init_worker():
+    global LAYERS
+    if LAYERS is None:  # spawn start method: nothing inherited from the parent
+        LAYERS = build_layers()
+    else:
+        # PROJ handles are per-process; recreate rather than reuse the parent's
+        LAYERS["to_m"] = Transformer.from_crs("EPSG:4326", "EPSG:26917", always_xy=True)
+
+
+def locate_neighbourhoods(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Neighbourhood name per point (None outside every polygon). First matching polygon wins."""
+    names = np.full(len(lon), None, dtype=object)
+    todo = np.ones(len(lon), dtype=bool)
+
+    for i, (minx, miny, maxx, maxy) in enumerate(LAYERS["nbh_bounds"]):
+        cand = np.flatnonzero(todo & (lon >= minx) & (lon <= maxx) & (lat >= miny) & (lat <= maxy))
+        if len(cand) == 0:
+            continue
+        hit = cand[shapely.contains_xy(LAYERS["nbh_polys"][i], lon[cand], lat[cand])]
+        names[hit] = LAYERS["nbh_names"][i]
+        todo[hit] = False
+
+    return names
+
+
+def score_chunk(df: pd.DataFrame, lon_col: str, lat_col: str) -> pd.DataFrame:
+    lon = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float)
+    lat = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float)
+    ok = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+
+    out = df.copy()
+    names = np.full(len(df), None, dtype=object)
+    names[ok] = locate_neighbourhoods(lon[ok], lat[ok])
+    out["neighbourhood_name"] = pd.array(names, dtype="string")
+
+    x, y = LAYERS["to_m"].transform(lon[ok], lat[ok])
+    pts_m = shapely.points(x, y)
+    cfg = LAYERS["cfg"]
+
+    for metric, (_load, score) in METRICS.items():
+        (idx_left, _idx_right), dist = LAYERS["trees"][metric].query_nearest(
+            pts_m, return_distance=True, all_matches=False
+        )
+        dists = np.full(len(df), np.nan)
+        dists[ok[idx_left]] = dist
+
+        scores = np.full(len(df), np.nan)
+        scores[ok] = score(dists[ok], cfg[metric]["max_dist_m"])
+
+        if metric == "transit" and "reliability" in LAYERS:
+            rel = np.array([LAYERS["reliability"].get(n, np.nan) for n in names[ok]], dtype=float)
+            scores[ok] = transit.apply_reliability(scores[ok], rel, cfg["transit"]["reliability_weight"])
+
+        out[f"{metric}_dist_m"] = np.round(dists, 1)
+        out[f"{metric}_score"] = scores
+
+    return out
+
+
+def read_chunks(path: Path, chunk_size: int):
+    if path.suffix.lower() == ".parquet":
+        pq = parquet_module()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, low_memory=False)
+
+
+def write_chunk(df: pd.DataFrame, path: Path, state: dict):
+    """Append one scored chunk to CSV or Parquet (Parquet schema is fixed by the first chunk)."""
+    if path.suffix.lower() == ".parquet":
+        pa, pq = parquet_module(with_arrow=True)
+        if state.get("writer") is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            state["writer"] = pq.ParquetWriter(path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=state["writer"].schema, preserve_index=False)
+        state["writer"].write_table(table)
+    else:
+        first = state["rows"] == 0
+        df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+    state["rows"] += len(df)
+
+
+def parquet_module(with_arrow: bool = False):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet input/output needs pyarrow. Run: pip install pyarrow") from e
+    return (pa, pq) if with_arrow else pq
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Score geocoded addresses against the Invisible City layers.")
+    ap.add_argument("input", type=Path, help="CSV or .parquet with lon/lat columns")
+    ap.add_argument("output", type=Path, help="CSV or .parquet to write")
+    ap.add_argument("--lon-col", default="lon")
+    ap.add_argument("--lat-col", default="lat")
+    ap.add_argument("--chunk-size", type=int, default=200_000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    if not args.input.exists():
+        raise FileNotFoundError(f"Missing input: {args.input}")
+    if args.input.resolve() == args.output.resolve():
+        raise ValueError("Output must be a different file from the input")
+
+    global LAYERS
+    t0 = time.perf_counter()
+    LAYERS = build_layers()
+    print(f"✅ Layers + indexes ready in {time.perf_counter() - t0:.1f}s")
+
+    # fork shares LAYERS copy-on-write; spawn-only platforms rebuild them once per worker
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+    max_in_flight = 2 * args.workers
+
+    written = {"rows": 0, "writer": None}
+    t0 = time.perf_counter()
+    try:
+        with ctx.Pool(args.workers, initializer=init_worker) as pool:
+            pending = deque()
+            for chunk in read_chunks(args.input, args.chunk_size):
+                for col in [args.lon_col, args.lat_col]:
+                    if col not in chunk.columns:
+                        raise KeyError(f"{args.input.name}: no '{col}' column (see --lon-col / --lat-col)")
+                pending.append(pool.apply_async(score_chunk, (chunk, args.lon_col, args.lat_col)))
+                # keep input order and a bounded number of chunks in memory
+                while len(pending) >= max_in_flight:
+                    write_chunk(pending.popleft().get(), args.output, written)
+            while pending:
+                write_chunk(pending.popleft().get(), args.output, written)
+    finally:
+        if written["writer"] is not None:
+            written["writer"].close()
+
+    dt = time.perf_counter() - t0
+    print("✅ Saved:", args.output)
+    print(f"Rows: {written['rows']:,} in {dt:.1f}s ({written['rows'] / max(dt, 1e-9) * 60:,.0f} rows/min)")
+    print('Attribution: Contains information licensed under the Open Government Licence - Toronto; © OpenStreetMap contributors')
+
+
+if __name__ == "__main__":
+    main()
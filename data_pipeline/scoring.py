@@ -0,0 +1,70 @@
+# data_pipeline/scoring.py
+# Shared scoring parameters, read from data_pipeline/scoring.json.
+# Edit the JSON (not the compute_* scripts) to tune distance cut-offs and equity weights;
+# watch_pipeline.py picks up changes to it without a restart.
+
+import copy
+import json
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCORING_JSON = ROOT / "data_pipeline" / "scoring.json"
+
+# Used when scoring.json is missing or leaves a key out
+DEFAULTS = {
+    # reliability_weight > 0 folds compute_service_reliability.py output into transit_score;
+    # stops / POIs closer than *merge_tolerance_m are consolidated into one (normalize_points.py)
+    "transit": {"max_dist_m": 2000.0, "reliability_weight": 0.0, "stop_merge_tolerance_m": 30.0},
+    "food": {"max_dist_m": 1500.0, "merge_tolerance_m": 10.0},
+    "access": {"max_dist_m": 2000.0, "merge_tolerance_m": 10.0},
+    "equity_v2": {"weights": {"transit": 1.0, "food": 1.0, "access": 1.0}},
+}
+
+# Point-consolidation tolerance setting of each layer
+MERGE_TOLERANCE_KEYS = {"transit": "stop_merge_tolerance_m", "food": "merge_tolerance_m", "access": "merge_tolerance_m"}
+
+
+def load_scoring(path: Path = SCORING_JSON) -> dict:
+    """
+    DEFAULTS overlaid with whatever scoring.json sets, key by key (nested objects such as
+    equity_v2.weights are merged too, so setting one weight keeps the others' defaults).
+    Raises ValueError on malformed JSON so callers can keep their last good config.
+    """
+    cfg = copy.deepcopy(DEFAULTS)
+    if not path.exists():
+        return cfg
+
+    try:
+        user = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path.name}: {e}") from e
+
+    for section, values in user.items():
+        if not isinstance(values, dict):
+            raise ValueError(f"{path.name}: section '{section}' must be an object")
+        merged = cfg.setdefault(section, {})
+        for key, value in values.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = {**merged[key], **value}
+            else:
+                merged[key] = value
+
+    for metric in ["transit", "food", "access"]:
+        if float(cfg[metric]["max_dist_m"]) <= 0:
+            raise ValueError(f"{path.name}: {metric}.max_dist_m must be > 0")
+    for metric, key in MERGE_TOLERANCE_KEYS.items():
+        if float(cfg[metric][key]) < 0:
+            raise ValueError(f"{path.name}: {metric}.{key} must be >= 0")
+    if not 0.0 <= float(cfg["transit"]["reliability_weight"]) <= 1.0:
+        raise ValueError(f"{path.name}: transit.reliability_weight must be between 0 and 1")
+
+    return cfg
+
+
+def equity_weights(cfg: dict) -> dict:
+    """equity_v2 weights normalised to sum to 1 -> {"transit": w_t, "food": w_f, "access": w_a}."""
+    w = {k: float(cfg["equity_v2"]["weights"].get(k, 0.0)) for k in ["transit", "food", "access"]}
+    total = sum(w.values())
+    if total <= 0:
+        raise ValueError("equity_v2.weights must have a positive sum")
+    return {k: v / total for k, v in w.items()}
@@ -0,0 +1,65 @@
+# data_pipeline/store.py
+# Local analytical store shared by the pipeline stages: data_pipeline/output/pipeline.gpkg
+#   neighbourhoods    polygons + neighbourhood_name (EPSG:4326, R-tree indexed), stored once
+#   <name>_scores     attribute-only tables keyed by neighbourhood_name (no geometry)
+# Stages read just the columns they need from here. The *_scores.geojson files in output/ and
+# web/public/ are exports (neighbourhoods joined to a scores table), not inputs.
+
+from pathlib import Path
+
+import pandas as pd
+import geopandas as gpd
+from pyogrio import list_layers, read_dataframe, write_dataframe
+
+ROOT = Path(__file__).resolve().parents[1]
+STORE_GPKG = ROOT / "data_pipeline" / "output" / "pipeline.gpkg"
+
+NBH_LAYER = "neighbourhoods"
+
+
+def _require(layer: str, path: Path):
+    if not path.exists():
+        raise FileNotFoundError(f"Missing analytical store: {path} (run the compute_* scripts first)")
+    if layer not in {name for name, _geom in list_layers(path)}:
+        raise FileNotFoundError(f"{path.name} has no '{layer}' table (run the stage that produces it first)")
+
+
+def write_neighbourhoods(nbh: gpd.GeoDataFrame, path: Path = STORE_GPKG):
+    """Neighbourhood polygons in EPSG:4326; must already carry neighbourhood_name."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nbh = nbh.set_crs(epsg=4326) if nbh.crs is None else nbh.to_crs(epsg=4326)
+    write_dataframe(nbh, path, layer=NBH_LAYER, driver="GPKG", layer_options={"OVERWRITE": "YES", "SPATIAL_INDEX": "YES"})
+
+
+def write_scores(name: str, df: pd.DataFrame, path: Path = STORE_GPKG):
+    """One row per neighbourhood: neighbourhood_name + score columns (geometry is dropped)."""
+    if "neighbourhood_name" not in df.columns:
+        raise ValueError(f"{name}_scores needs a neighbourhood_name column")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pd.DataFrame(df.drop(columns="geometry", errors="ignore"))
+    write_dataframe(table, path, layer=f"{name}_scores", driver="GPKG", layer_options={"OVERWRITE": "YES"})
+
+
+def read_scores(name: str, columns=None, path: Path = STORE_GPKG) -> pd.DataFrame:
+    """Attribute table only; `columns` limits what is read (neighbourhood_name is always included)."""
+    layer = f"{name}_scores"
+    _require(layer, path)
+    if columns is not None:
+        columns = ["neighbourhood_name"] + [c for c in columns if c != "neighbourhood_name"]
+    return read_dataframe(path, layer=layer, columns=columns, read_geometry=False)
+
+
+def read_neighbourhoods(columns=None, path: Path = STORE_GPKG) -> gpd.GeoDataFrame:
+    _require(NBH_LAYER, path)
+    if columns is not None:
+        columns = ["neighbourhood_name"] + [c for c in columns if c != "neighbourhood_name"]
+    return read_dataframe(path, layer=NBH_LAYER, columns=columns)
+
+
+def export_geojson(name: str, paths, path: Path = STORE_GPKG) -> gpd.GeoDataFrame:
+    """neighbourhoods ⨝ <name>_scores written to each GeoJSON path (e.g. output/ + web/public/)."""
+    out = read_neighbourhoods(path=path).merge(read_scores(name, path=path), on="neighbourhood_name", how="left")
+    for p in paths:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        out.to_file(p, driver="GeoJSON")
+    return out
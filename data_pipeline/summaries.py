@@ -0,0 +1,102 @@
+# data_pipeline/summaries.py
+# Compact per-metric summary for the UI, written next to each score layer:
+#   web/public/neighbourhood_<metric>_summary.json (+ copy in data_pipeline/output/)
+# Contents: rank table, quantile breaks, distance histogram, "neighbourhoods beyond X m" counts
+# for every 50 m step, and centroid points sorted by distance (dead-zone overlay = prefix slice).
+# The browser reads these instead of scanning every GeoJSON feature on each control change.
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import geopandas as gpd
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT_DIR = ROOT / "data_pipeline" / "output"
+WEB_PUBLIC = ROOT / "web" / "public"
+
+STEP_M = 50
+QUANTILES = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+
+def _num(x):
+    """JSON-safe rounded float (NaN -> null)."""
+    x = float(x)
+    return None if math.isnan(x) else round(x, 1)
+
+
+def vertex_centroid(geom) -> tuple:
+    """Mean of the polygon vertices (ring-closing vertex excluded): the same point turf.centroid gives the web app."""
+    polys = getattr(geom, "geoms", [geom])
+    xy = np.vstack([np.asarray(ring.coords)[:-1] for p in polys for ring in [p.exterior, *p.interiors]])
+    return float(xy[:, 0].mean()), float(xy[:, 1].mean())
+
+
+def summary_paths(metric: str) -> list:
+    name = f"neighbourhood_{metric}_summary.json"
+    return [OUT_DIR / name, WEB_PUBLIC / name]
+
+
+def metric_summary(gdf: gpd.GeoDataFrame, score_col: str, dist_col: str = None) -> dict:
+    names = gdf["neighbourhood_name"].astype(str).to_numpy()
+    scores = gdf[score_col].astype(float).to_numpy()
+
+    # Best first; ties share a rank (1, 2, 2, 4 ...) and are listed by name
+    order = sorted(range(len(names)), key=lambda i: (-np.nan_to_num(scores[i], nan=-np.inf), names[i]))
+    ranking = []
+    for pos, i in enumerate(order):
+        score = _num(scores[i])
+        rank = ranking[-1]["rank"] if ranking and ranking[-1]["score"] == score else pos + 1
+        row = {"rank": rank, "neighbourhood_name": names[i], "score": score}
+        if dist_col:
+            row["dist_m"] = _num(gdf[dist_col].iloc[i])
+        ranking.append(row)
+
+    valid = scores[~np.isnan(scores)]
+    out = {
+        "score_col": score_col,
+        "count": int(len(names)),
+        "ranking": ranking,
+        "score_breaks": [round(float(q), 1) for q in np.quantile(valid, QUANTILES)] if len(valid) else [],
+    }
+    if not dist_col:
+        return out
+
+    dists = gdf[dist_col].astype(float).to_numpy()
+    d = dists[~np.isnan(dists)]
+    top = int(math.ceil(d.max() / STEP_M)) * STEP_M if len(d) else 0
+    edges = np.arange(0, top + STEP_M, STEP_M)
+
+    # dead-zone dots sit where MapView's GeoJSON fallback puts them (turf.centroid, in WGS84)
+    cent = [vertex_centroid(g) for g in gdf.geometry.to_crs(epsg=4326)]
+    by_dist = sorted(
+        ([round(cent[i][0], 6), round(cent[i][1], 6), round(float(dists[i]), 1), _num(scores[i]), names[i]]
+         for i in range(len(names)) if not np.isnan(dists[i])),
+        key=lambda p: -p[2],
+    )
+
+    out.update({
+        "dist_col": dist_col,
+        "dist_breaks": [round(float(q), 1) for q in np.quantile(d, QUANTILES)] if len(d) else [],
+        "step_m": STEP_M,
+        # counts[i] = neighbourhoods with edges[i] <= dist < edges[i + 1]
+        "dist_histogram": np.histogram(d, bins=edges)[0].tolist() if len(d) else [],
+        # beyond[i] = neighbourhoods with dist > i * step_m (0 past the end of the list)
+        "beyond": [int((d > t).sum()) for t in edges],
+        # [lon, lat, dist_m, score, name], farthest first: everything beyond X m is a prefix
+        "dist_points": by_dist,
+    })
+    return out
+
+
+def write_summary(metric: str, gdf: gpd.GeoDataFrame, score_col: str, dist_col: str = None) -> dict:
+    summary = metric_summary(gdf, score_col, dist_col)
+    text = json.dumps(summary, separators=(",", ":"), ensure_ascii=False)
+    for p in summary_paths(metric):
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, p)
+    return summary
@@ -0,0 +1,243 @@
+# data_pipeline/watch_pipeline.py
+# Watch mode: load neighbourhoods + stop/POI layers once, then poll data_pipeline/data and
+# scoring.json and rewrite only the score files whose inputs changed.
+#   - a changed POI/stop file re-runs that metric's nearest-distance query
+#   - a changed max_dist_m only re-scores the cached distances (no spatial work);
+#     a changed stop_merge_tolerance_m / merge_tolerance_m rebuilds that consolidated point layer
+#   - equity_v2 is rebuilt in memory whenever any of its three inputs moved, and equity v1
+#     (compute_equity.py) whenever transit or food did
+#   - with transit.reliability_weight > 0, a new neighbourhood_reliability.csv re-scores transit
+#   - the content-hashed web copies + manifest (publish_web.py) are refreshed after every rebuild
+# Usage: python data_pipeline/watch_pipeline.py [--interval 0.25]
+
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import geopandas as gpd
+from shapely.strtree import STRtree
+
+import compute_transit_access as transit
+import compute_food_access as food
+import compute_accessibility as access
+import compute_equity as equity
+import compute_equity_v2 as equity_v2
+import store
+from publish_web import publish
+from summaries import write_summary
+from scoring import MERGE_TOLERANCE_KEYS, SCORING_JSON, load_scoring, equity_weights
+
+METRICS = {
+    "transit": {
+        "inputs": [transit.SURFACE_GTFS_ZIP, transit.OSM_SUBWAY_GEOJSON],
+        "load": lambda: transit.load_all_stops(transit.SURFACE_GTFS_ZIP, transit.OSM_SUBWAY_GEOJSON),
+        "score": transit.distance_to_score,
+        "outputs": [transit.OUT_GEOJSON, transit.OUT_WEB_COPY],
+    },
+    "food": {
+        "inputs": [food.FOOD_POINTS],
+        "load": lambda: food.load_food_points(food.FOOD_POINTS),
+        "score": food.distance_to_score,
+        "outputs": [food.OUT_GEOJSON, food.OUT_WEB_COPY],
+    },
+    "access": {
+        "inputs": [access.ACCESS_POINTS],
+        "load": lambda: access.load_access_points(access.ACCESS_POINTS),
+        "score": access.distance_to_score,
+        "outputs": [access.OUT_GEOJSON, access.OUT_WEB_COPY],
+    },
+}
+
+LIMITING_LABELS = {"transit_score": "Transit", "food_score": "Food", "access_score": "Access"}
+
+
+def mtime(p: Path):
+    try:
+        return p.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_neighbourhoods():
+    """(EPSG:4326 polygons with neighbourhood_name, representative points in EPSG:26917)."""
+    nbh = gpd.read_file(transit.NBH_GEOJSON)
+    nbh = nbh.set_crs(epsg=4326) if nbh.crs is None else nbh.to_crs(epsg=4326)
+    nbh["neighbourhood_name"] = nbh[transit.pick_name_col(nbh)].astype(str).values
+
+    points_m = gpd.GeoSeries(nbh.geometry.representative_point(), crs="EPSG:4326").to_crs(epsg=26917)
+    return nbh, points_m.values
+
+
+def nearest_dist_m(points_m, layer: gpd.GeoDataFrame) -> np.ndarray:
+    """Metres from each neighbourhood point to the nearest feature of layer (order-safe)."""
+    tree = STRtree(list(layer.to_crs(epsg=26917).geometry.values))
+    (idx_left, _idx_right), dist = tree.query_nearest(points_m, return_distance=True)
+
+    dists = np.empty(len(points_m), dtype=float)
+    dists[idx_left] = np.array(dist, dtype=float)
+    return dists
+
+
+def write_geojson(gdf: gpd.GeoDataFrame, paths):
+    """Write once to a temp file, swap it in atomically, then copy to the other paths."""
+    first = paths[0]
+    tmp = first.with_name(first.name + ".tmp")
+    gdf.to_file(tmp, driver="GeoJSON")
+    os.replace(tmp, first)
+
+    for p in paths[1:]:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        shutil.copyfile(first, tmp)
+        os.replace(tmp, p)
+
+
+# (score_col, dist_col) of the UI summary each layer gets; equity v1 has none (the app does not load it)
+SUMMARY_COLS = {
+    "transit": ("transit_score", "transit_dist_m"),
+    "food": ("food_score", "food_dist_m"),
+    "access": ("access_score", "access_dist_m"),
+    "equity_v2": ("equity_score_v2", None),
+}
+
+
+def save(name: str, frame: gpd.GeoDataFrame, nbh: gpd.GeoDataFrame, paths):
+    """Scores table into the analytical store, then the GeoJSON exports + UI summary from the in-memory frame."""
+    score_cols = [c for c in frame.columns if c not in nbh.columns]
+    store.write_scores(name, frame[["neighbourhood_name"] + score_cols])
+    write_geojson(frame, paths)
+    if name in SUMMARY_COLS:
+        write_summary(name, frame, *SUMMARY_COLS[name])
+
+
+def metric_frame(nbh, metric: str, dists: np.ndarray, cfg: dict) -> gpd.GeoDataFrame:
+    out = nbh.copy()
+    out[f"{metric}_dist_m"] = np.round(dists, 1)
+    out[f"{metric}_score"] = METRICS[metric]["score"](dists, cfg[metric]["max_dist_m"])
+
+    weight = cfg[metric].get("reliability_weight", 0)
+    if metric == "transit" and weight > 0:
+        try:
+            rel = transit.load_reliability(out["neighbourhood_name"])
+        except FileNotFoundError as e:
+            print(f"⚠️  {e}")
+        else:
+            out["transit_reliability"] = np.round(rel, 3)
+            out["transit_score"] = transit.apply_reliability(out["transit_score"].to_numpy(), rel, weight)
+    return out
+
+
+def equity_frame(frames: dict, cfg: dict) -> gpd.GeoDataFrame:
+    """Same columns as compute_equity_v2.py, built from the in-memory metric frames."""
+    w = equity_weights(cfg)
+    out = frames["transit"].copy()
+    for m in ["food", "access"]:
+        out[f"{m}_score"] = frames[m][f"{m}_score"].values
+        out[f"{m}_dist_m"] = frames[m][f"{m}_dist_m"].values
+
+    out["equity_score_v2"] = (
+        w["transit"] * out["transit_score"] + w["food"] * out["food_score"] + w["access"] * out["access_score"]
+    ).round(1)
+    # idxmin keeps the first column on ties, same order as compute_equity_v2.limiting()
+    out["limiting_factor_v2"] = out[list(LIMITING_LABELS)].idxmin(axis=1).map(LIMITING_LABELS)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild score layers whenever inputs or scoring.json change.")
+    ap.add_argument("--interval", type=float, default=0.25, help="poll interval in seconds (default 0.25)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    cfg = load_scoring()
+    nbh, points_m = load_neighbourhoods()
+
+    dists = {}
+    for metric, spec in METRICS.items():
+        for p in spec["inputs"]:
+            if not p.exists():
+                raise FileNotFoundError(f"Missing input for {metric}: {p}")
+        dists[metric] = nearest_dist_m(points_m, spec["load"]())
+
+    frames = {m: metric_frame(nbh, m, d, cfg) for m, d in dists.items()}
+    store.write_neighbourhoods(nbh)
+    print(f"✅ Layers loaded in {time.perf_counter() - t0:.1f}s ({len(nbh)} neighbourhoods)")
+
+    watched = [SCORING_JSON, transit.RELIABILITY_CSV] + [p for spec in METRICS.values() for p in spec["inputs"]]
+    seen = {p: mtime(p) for p in watched}
+    print("👀 Watching:")
+    for p in watched:
+        print("   ", p)
+
+    while True:
+        time.sleep(args.interval)
+        changed = {p for p in watched if mtime(p) != seen[p]}
+        if not changed:
+            continue
+
+        t0 = time.perf_counter()
+        for p in changed:
+            seen[p] = mtime(p)
+
+        dirty = set()
+        reload = {m for m, spec in METRICS.items() if changed.intersection(spec["inputs"])}
+
+        if SCORING_JSON in changed:
+            try:
+                new_cfg = load_scoring()
+                equity_weights(new_cfg)
+            except ValueError as e:
+                print(f"⚠️  Ignoring scoring.json change: {e}")
+                new_cfg = cfg
+            for m in METRICS:
+                if new_cfg[m] != cfg[m]:
+                    dirty.add(m)
+            # a different merge tolerance changes the point layer itself, not just the scoring
+            for m, key in MERGE_TOLERANCE_KEYS.items():
+                if new_cfg[m][key] != cfg[m][key]:
+                    reload.add(m)
+            equity_dirty = new_cfg["equity_v2"] != cfg["equity_v2"]
+            cfg = new_cfg
+        else:
+            equity_dirty = False
+
+        if transit.RELIABILITY_CSV in changed and cfg["transit"]["reliability_weight"] > 0:
+            dirty.add("transit")
+
+        for m, spec in METRICS.items():
+            if m not in reload:
+                continue
+            if any(mtime(p) is None for p in spec["inputs"]):
+                print(f"⚠️  {m}: input missing, keeping previous scores")
+                continue
+            try:
+                dists[m] = nearest_dist_m(points_m, spec["load"]())
+            except Exception as e:  # half-written file, bad geometry, ...
+                print(f"⚠️  {m}: could not reload ({e}), keeping previous scores")
+                continue
+            dirty.add(m)
+
+        for m in sorted(dirty):
+            frames[m] = metric_frame(nbh, m, dists[m], cfg)
+            save(m, frames[m], nbh, METRICS[m]["outputs"])
+
+        if dirty or equity_dirty:
+            rebuilt = sorted(dirty)
+            if dirty & {"transit", "food"}:
+                v1 = nbh.merge(equity.equity_scores(frames["transit"], frames["food"]), on="neighbourhood_name", how="left")
+                save("equity", v1, nbh, [equity.OUT_GEOJSON, equity.OUT_WEB_COPY])
+                rebuilt.append("equity")
+            save("equity_v2", equity_frame(frames, cfg), nbh, [equity_v2.OUT_GEOJSON, equity_v2.OUT_WEB_COPY])
+            publish(verbose=False)
+            rebuilt.append("equity_v2")
+            print(f"♻️  Rebuilt {', '.join(rebuilt)} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
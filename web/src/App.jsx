@@ -1,5 +1,6 @@
 import { useEffect, useMemo, useState } from "react";
 import MapView from "./MapView";
+import { fetchData } from "./dataManifest";
 import "./app.css";
 
 const MODES = {
@@ -35,14 +36,23 @@ export default function App() {
   const [accessGJ, setAccessGJ] = useState(null);
   const [equityV2GJ, setEquityV2GJ] = useState(null);
 
+  // Precomputed per-metric summaries (ranking, breaks, distance counts) from the pipeline
+  const [summaries, setSummaries] = useState({});
+
   // Selected feature props from current map dataset
   const [selected, setSelected] = useState(null);
 
   useEffect(() => {
-    fetch("/neighbourhood_transit_scores.geojson").then((r) => r.json()).then(setTransitGJ);
-    fetch("/neighbourhood_food_scores.geojson").then((r) => r.json()).then(setFoodGJ);
-    fetch("/neighbourhood_access_scores.geojson").then((r) => r.json()).then(setAccessGJ);
-    fetch("/neighbourhood_equity_v2_scores.geojson").then((r) => r.json()).then(setEquityV2GJ);
+    fetchData("neighbourhood_transit_scores.geojson").then(setTransitGJ);
+    fetchData("neighbourhood_food_scores.geojson").then(setFoodGJ);
+    fetchData("neighbourhood_access_scores.geojson").then(setAccessGJ);
+    fetchData("neighbourhood_equity_v2_scores.geojson").then(setEquityV2GJ);
+
+    for (const m of Object.values(MODES)) {
+      fetchData(`neighbourhood_${m}_summary.json`)
+        .then((s) => setSummaries((prev) => ({ ...prev, [m]: s })))
+        .catch(() => {}); // optional: UI falls back to the GeoJSONs
+    }
   }, []);
 
   const { geojson, metric, title } = useMemo(() => {
@@ -52,6 +62,15 @@ export default function App() {
     return { geojson: equityV2GJ, metric: "equity_score_v2", title: "Equity Score (v2)" };
   }, [mode, transitGJ, foodGJ, accessGJ, equityV2GJ]);
 
+  const summary = summaries[mode];
+  const transitSummary = summaries[MODES.TRANSIT] ?? null;
+
+  const rankByName = useMemo(() => {
+    const ranks = new Map();
+    for (const r of summary?.ranking ?? []) ranks.set(r.neighbourhood_name, r.rank);
+    return ranks;
+  }, [summary]);
+
   const name =
     selected?.neighbourhood_name ||
     selected?.AREA_NAME ||
@@ -80,6 +99,12 @@ export default function App() {
     equityV2Score;
 
   const scoreWidth = `${clamp01to100(score)}%`;
+  const rank = selected ? rankByName.get(name) : undefined;
+
+  // "N neighbourhoods beyond X m": beyond[i] counts transit_dist_m > i * step_m
+  const deadZoneCount = transitSummary
+    ? transitSummary.beyond?.[Math.floor(deadZoneThresholdM / transitSummary.step_m)] ?? 0
+    : null;
 
   // Overlays only meaningful when we have transit_dist_m in the active geojson:
   // Transit geojson definitely has it, Equity v2 geojson also has it (because it starts from transit).
@@ -149,6 +174,9 @@ export default function App() {
                 <option value={1500}>1500 m</option>
                 <option value={2000}>2000 m</option>
               </select>
+              {deadZoneCount != null && (
+                <span>{deadZoneCount} of {transitSummary.count} neighbourhoods beyond</span>
+              )}
             </div>
 
             {!overlaysEnabled && (
@@ -167,6 +195,7 @@ export default function App() {
             showHeatmap={showHeatmap}
             showDeadZones={showDeadZones}
             deadZoneThresholdM={deadZoneThresholdM}
+            deadZoneSummary={overlaysEnabled ? transitSummary : null}
           />
 
           <div className="legend">
@@ -177,6 +206,9 @@ export default function App() {
               <span>Higher</span>
             </div>
             <div className="legendFoot">0–100 score (higher is better)</div>
+            {summary?.score_breaks?.length > 0 && (
+              <div className="legendFoot">Quintiles: {summary.score_breaks.map((b) => Math.round(b)).join(" · ")}</div>
+            )}
           </div>
         </section>
 
@@ -192,6 +224,11 @@ export default function App() {
             <div className="barBg">
               <div className="barFill" style={{ width: scoreWidth }} />
             </div>
+            {rank != null && (
+              <div className="meta">
+                Rank <b>{rank}</b> of {summary.count}
+              </div>
+            )}
 
             {mode === MODES.TRANSIT && (
               <div className="meta">
@@ -2,6 +2,7 @@ import { useEffect, useRef, useState } from "react";
 import maplibregl from "maplibre-gl";
 import "maplibre-gl/dist/maplibre-gl.css";
 import { centroid } from "@turf/turf";
+import { fetchData } from "./dataManifest";
 
 function buildDeadzonePoints(neighbourhoodsGeojson, thresholdM) {
   if (!neighbourhoodsGeojson?.features) return { type: "FeatureCollection", features: [] };
@@ -24,6 +25,22 @@ function buildDeadzonePoints(neighbourhoodsGeojson, thresholdM) {
   return { type: "FeatureCollection", features };
 }
 
+// Same points from the precomputed transit summary (turf.centroid positions, computed in the
+// pipeline): dist_points is sorted farthest first, so everything beyond the threshold is a prefix.
+function deadzonePointsFromSummary(summary, thresholdM) {
+  const pts = summary?.dist_points ?? [];
+  const features = [];
+  for (const [lon, lat, dist, score, name] of pts) {
+    if (!(dist > thresholdM)) break;
+    features.push({
+      type: "Feature",
+      geometry: { type: "Point", coordinates: [lon, lat] },
+      properties: { neighbourhood_name: name, transit_dist_m: dist, transit_score: score },
+    });
+  }
+  return { type: "FeatureCollection", features };
+}
+
 export default function MapView({
   geojson,
   onSelect,
@@ -31,6 +48,7 @@ export default function MapView({
   showHeatmap = false,
   showDeadZones = false,
   deadZoneThresholdM = 1200,
+  deadZoneSummary = null,
 }) {
   const mapContainer = useRef(null);
   const mapRef = useRef(null);
@@ -58,7 +76,9 @@ export default function MapView({
       p?.NEIGH_NAME ||
       "Neighbourhood";
 
-    const deadzonePoints = buildDeadzonePoints(geojson, deadZoneThresholdM);
+    const deadzonePoints = deadZoneSummary
+      ? deadzonePointsFromSummary(deadZoneSummary, deadZoneThresholdM)
+      : buildDeadzonePoints(geojson, deadZoneThresholdM);
 
     // Update existing map instance
     if (mapRef.current) {
@@ -136,7 +156,7 @@ export default function MapView({
 
       // Heatmap of stops (optional)
       try {
-        const stops = await fetch("/transit_stops.geojson").then((r) => r.json());
+        const stops = await fetchData("transit_stops.geojson");
         map.addSource("stops", { type: "geojson", data: stops });
 
         map.addLayer({
@@ -182,7 +202,7 @@ export default function MapView({
       map.remove();
       mapRef.current = null;
     };
-  }, [geojson, metric, onSelect, showHeatmap, showDeadZones, deadZoneThresholdM]);
+  }, [geojson, metric, onSelect, showHeatmap, showDeadZones, deadZoneThresholdM, deadZoneSummary]);
 
   return (
     <div style={{ position: "relative", height: "100%", width: "100%" }}>
@@ -0,0 +1,24 @@
+// Data files are published under content-hashed names (data_pipeline/publish_web.py) so the CDN
+// can cache them forever; /data-manifest.json maps the plain names to the current hashed URLs.
+
+let manifestPromise = null;
+
+function loadManifest() {
+  if (!manifestPromise) {
+    manifestPromise = fetch("/data-manifest.json", { cache: "no-cache" })
+      .then((r) => (r.ok ? r.json() : { assets: {} }))
+      // no manifest yet (or the SPA rewrite answered with index.html): use the plain names
+      .catch(() => ({ assets: {} }));
+  }
+  return manifestPromise;
+}
+
+export async function dataUrl(name) {
+  const manifest = await loadManifest();
+  return manifest?.assets?.[name] ?? `/${name}`;
+}
+
+export async function fetchData(name) {
+  const r = await fetch(await dataUrl(name));
+  return r.json();
+}